@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+	benchmarks - bench
+	~~~~~~~~~~~~~~~~~~
+
+	Benchmarks of olaf hot paths on synthetic sites
+
+	Run from repository root with olaf installed (pip install -e .):
+
+		python benchmarks/bench.py run -o results.json
+		python benchmarks/bench.py compare baseline.json results.json
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import platform
+import tempfile
+import datetime
+from timeit import default_timer
+
+import click
+
+from olaf import app, cache_dir, get_theme_by_name, default_theme
+from olaf.tools import freezer
+from olaf.utils import change_dir
+
+from sitegen import generate_site
+
+results_version = 1
+
+default_sizes = '100,1000,10000,50000'
+
+# number of slugs looked up per run of `get_post_by_slug` benchmark
+slug_lookups = 1000
+
+
+def measure(func, repeat, setup=None):
+	"""
+	run function given number of times, returns
+	{'min': seconds, 'median': seconds, 'runs': repeat}
+	"""
+	times = []
+	for _ in xrange(repeat):
+		if setup:
+			setup()
+		start = default_timer()
+		func()
+		times.append(default_timer() - start)
+
+	times.sort()
+	return {'min': times[0], 'median': times[len(times) // 2], 'runs': repeat}
+
+
+def get_view(client, url):
+	"""
+	get function fetching url and reading whole response
+	"""
+	def fetch():
+		response = client.get(url)
+		assert response.status_code == 200, url
+		response.data  # streamed responses are generated here
+	return fetch
+
+
+def bench_site(site_path, repeat, freeze=True, jobs=1):
+	"""
+	get {benchmark name: timings} of a site
+	"""
+	theme_path = get_theme_by_name(default_theme)
+	results = {}
+
+	def create_app():
+		return app.create_app(site_path, theme_path)
+
+	def clear_pages():
+		# loaded pages are reused by later apps created in same process
+		app.contents._file_cache.clear()
+
+	results['create_app'] = measure(create_app, repeat, clear_pages)
+	flask_app = create_app()
+
+	with flask_app.test_request_context():
+		tag = max(app.content_index.tags,
+			key=lambda tag: len(app.content_index.tags[tag]))
+		year, year_count, months = app.content_index.archive_counts()[0]
+		month = months[0][0]
+		slugs = [post.slug for post in app.content_index.posts]
+
+		filters = [
+			('get_posts', {}),
+			('get_posts_page', {'page_no': 2}),
+			('get_posts_tag', {'tag': tag, 'page_no': 1}),
+			('get_posts_year', {'year': year}),
+			('get_posts_month', {'year': year, 'month': month})]
+		for name, kwargs in filters:
+			results[name] = measure(
+				lambda: app.get_posts(**kwargs), repeat)
+
+		rng = random.Random(1)
+		lookups = [rng.choice(slugs) for _ in xrange(slug_lookups)]
+
+		def get_post_by_slug():
+			for slug in lookups:
+				app.get_post_by_slug(slug)
+
+		results['get_post_by_slug'] = measure(get_post_by_slug, repeat)
+
+	client = flask_app.test_client()
+	results['archive'] = measure(get_view(client, '/archive/'), repeat)
+
+	def clear_feed():
+		# rendered html is kept on page objects
+		app.feed_cache.clear()
+		for page in app.content_index:
+			page.__dict__.pop('html', None)
+
+	results['recent_feed'] = measure(get_view(client, '/recent.atom'),
+		repeat, clear_feed)
+	results['sitemap'] = measure(get_view(client, '/sitemap.xml'), repeat)
+
+	if freeze:
+		freeze_path = os.path.join(site_path, 'build')
+
+		def clean():
+			for path in (freeze_path, os.path.join(site_path, cache_dir)):
+				if os.path.isdir(path):
+					shutil.rmtree(path)
+
+		# full freeze with empty caches
+		results['freeze'] = measure(lambda: freezer.freeze(site_path,
+			theme_path, jobs=jobs, full=True, freeze_path=freeze_path),
+			1, clean)
+
+	return results
+
+
+@click.group()
+def cli():
+	"""
+	olaf benchmarks
+	"""
+
+
+@cli.command()
+@click.argument('path', type=click.Path(exists=False))
+@click.option('-n', '--posts', default=100, help='number of posts')
+@click.option('--tags', default=50, help='number of distinct tags')
+@click.option('--code-ratio', default=0.3,
+	help='share of paragraphs followed by a code block')
+@click.option('--years', default=5, help='years post dates are spread over')
+@click.option('--seed', default=1, help='random seed')
+def generate(path, posts, tags, code_ratio, years, seed):
+	"""
+	create a synthetic site at path
+	"""
+	generate_site(path, posts, tags, code_ratio, years, seed=seed)
+	click.secho('created site with {} posts'.format(posts), fg='green')
+
+
+@cli.command()
+@click.option('-o', '--output', default='bench-results.json',
+	help='results file (default: bench-results.json)')
+@click.option('-s', '--sizes', default=default_sizes,
+	help='comma separated numbers of posts (default: {})'.format(
+		default_sizes))
+@click.option('--tags', default=50, help='number of distinct tags')
+@click.option('--code-ratio', default=0.3,
+	help='share of paragraphs followed by a code block')
+@click.option('--years', default=5, help='years post dates are spread over')
+@click.option('-r', '--repeat', default=5, type=click.IntRange(1),
+	help='runs per benchmark, freeze runs once (default: 5)')
+@click.option('-j', '--jobs', default=1, type=click.IntRange(1),
+	help='freeze workers (default: 1)')
+@click.option('--no-freeze', is_flag=True, help='skip freeze benchmark')
+@click.option('--keep', type=click.Path(),
+	help='keep generated sites in this directory')
+def run(output, sizes, tags, code_ratio, years, repeat, jobs, no_freeze,
+	keep):
+	"""
+	benchmark synthetic sites of given sizes
+	"""
+	sizes = [int(size) for size in sizes.split(',')]
+	params = dict(tags=tags, code_ratio=code_ratio, years=years,
+		repeat=repeat, jobs=jobs)
+
+	work_path = keep or tempfile.mkdtemp()
+	results = {}
+	try:
+		for size in sizes:
+			site_path = os.path.join(os.path.abspath(work_path),
+				'site-{}'.format(size))
+			if not os.path.isdir(site_path):
+				click.echo('generating site with {} posts'.format(size))
+				generate_site(site_path, size, tags, code_ratio, years)
+
+			click.echo('benchmarking site with {} posts'.format(size))
+			with change_dir(site_path):
+				results[str(size)] = bench_site(
+					site_path, repeat, not no_freeze, jobs)
+
+			for name, timing in sorted(results[str(size)].items()):
+				click.echo('  {:<20} {:>10.4f}s'.format(name, timing['min']))
+	finally:
+		if not keep:
+			shutil.rmtree(work_path)
+
+	with open(output, 'w') as f:
+		json.dump({
+			'version': results_version,
+			'created': datetime.datetime.utcnow().isoformat(),
+			'python': platform.python_version(),
+			'platform': platform.platform(),
+			'params': params,
+			'results': results
+		}, f, indent=1, sort_keys=True)
+
+	click.secho('results written to {}'.format(output), fg='green')
+
+
+@cli.command()
+@click.argument('baseline', type=click.File())
+@click.argument('current', type=click.File())
+@click.option('-t', '--threshold', default=10.0,
+	help='slowdown percentage flagged as regression (default: 10)')
+@click.option('--min-time', default=0.001,
+	help='differences smaller than this many seconds are '
+	'ignored (default: 0.001)')
+def compare(baseline, current, threshold, min_time):
+	"""
+	compare results with a baseline, exits with status 1 on regressions
+	"""
+	baseline = json.load(baseline)
+	current = json.load(current)
+	if baseline.get('params') != current.get('params'):
+		click.secho('warning: results have different parameters', fg='yellow')
+
+	regressions = 0
+	for size, timings in sorted(current['results'].items(),
+		key=lambda item: int(item[0])):
+		base_timings = baseline['results'].get(size)
+		if base_timings is None:
+			continue
+
+		click.echo('{} posts'.format(size))
+		for name, timing in sorted(timings.items()):
+			if name not in base_timings:
+				continue
+
+			before = base_timings[name]['min']
+			after = timing['min']
+			change = (after - before) * 100.0 / before if before else 0.0
+
+			status = ''
+			if abs(after - before) >= min_time:
+				if change > threshold:
+					status = click.style('regression', fg='red')
+					regressions += 1
+				elif change < -threshold:
+					status = click.style('improved', fg='green')
+
+			click.echo('  {:<20} {:>10.4f}s {:>10.4f}s {:>+8.1f}% {}'.format(
+				name, before, after, change, status))
+
+	if regressions:
+		click.secho('{} regressions found'.format(regressions), fg='red')
+		sys.exit(1)
+
+
+if __name__ == '__main__':
+	cli()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+	benchmarks - sitegen
+	~~~~~~~~~~~~~~~~~~~~
+
+	Synthetic site generator used by benchmarks
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import bisect
+import random
+import datetime
+
+from olaf import contents_dir, posts_dir, pages_dir, create_project_site
+from olaf.utils import change_dir
+
+# words used to fill titles and paragraphs, common words followed by
+# a long tail of rare words, picked with skewed frequencies like natural text
+vocabulary = (u'flask markdown python static site page post tag archive '
+	u'feed sitemap theme template render cache index build freeze server '
+	u'request response content blog write read code test speed memory disk '
+	u'file url link image style script data query search word text date '
+	u'year month day time list item value key hash token').split() + [
+	u'term{}'.format(number) for number in xrange(5000)]
+
+code_block = u'''	:::python
+	def handler_{n}(request):
+		"""
+		handle request number {n}
+		"""
+		return render(request, 'page.html', count={n})
+'''
+
+
+class ZipfChoice(object):
+	"""
+	random choice of items where n-th item is n times less likely
+	than the first one
+	"""
+
+	def __init__(self, items):
+		self.items = items
+		self.cumulative = []
+		total = 0.0
+		for rank in xrange(1, len(items) + 1):
+			total += 1.0 / rank
+			self.cumulative.append(total)
+
+	def __call__(self, rng):
+		position = bisect.bisect(self.cumulative,
+			rng.random() * self.cumulative[-1])
+		return self.items[min(position, len(self.items) - 1)]
+
+
+choose_word = ZipfChoice(vocabulary)
+
+
+def get_words(rng, count):
+	"""
+	get sentence of given number of words
+	"""
+	return u' '.join(choose_word(rng) for _ in xrange(count))
+
+
+def get_post(rng, number, choose_tag, code_ratio, start, days):
+	"""
+	get markdown source of a synthetic post
+	"""
+	date = start + datetime.timedelta(days=rng.randrange(days))
+	meta = [u'title: Post {} {}'.format(number, get_words(rng, 4)),
+		u'date: {}'.format(date.isoformat())]
+
+	if choose_tag:
+		# few tags are used by most posts
+		post_tags = set(choose_tag(rng) for _ in xrange(rng.randint(1, 3)))
+		meta.append(u'tags: [{}]'.format(u', '.join(sorted(post_tags))))
+
+	if rng.random() < 0.2:
+		meta.append(u'updated: {}'.format(
+			(date + datetime.timedelta(days=rng.randint(1, 30))).isoformat()))
+
+	body = [u'# {}'.format(get_words(rng, 5))]
+	for paragraph in xrange(rng.randint(3, 8)):
+		body.append(u'{} *{}* [{}](http://example.com/{}).'.format(
+			get_words(rng, rng.randint(40, 120)).capitalize(),
+			get_words(rng, 2), get_words(rng, 1), paragraph))
+		if rng.random() < code_ratio:
+			body.append(code_block.format(n=number * 10 + paragraph))
+
+	return u'\n'.join(meta) + u'\n\n' + u'\n\n'.join(body) + u'\n'
+
+
+def generate_site(path, posts=100, tags=50, code_ratio=0.3, years=5,
+	pages=5, seed=1):
+	"""
+	create a site with synthetic posts and pages at given path.
+
+	`tags` is number of distinct tags, `code_ratio` is share of paragraphs
+	followed by a code block and post dates are spread over `years`
+	years ending on 2015-12-31. Same arguments generate same site.
+	"""
+	rng = random.Random(seed)
+	parent, name = os.path.split(os.path.abspath(path))
+	with change_dir(parent):
+		create_project_site(name)
+
+	choose_tag = None
+	if tags:
+		choose_tag = ZipfChoice(
+			[u'tag-{}'.format(number) for number in xrange(tags)])
+	end = datetime.date(2015, 12, 31)
+	start = end - datetime.timedelta(days=365 * years)
+	days = (end - start).days + 1
+
+	root = os.path.join(path, contents_dir)
+	for number in xrange(posts):
+		post = get_post(rng, number, choose_tag, code_ratio, start, days)
+		with open(os.path.join(root, posts_dir,
+			'post-{}.md'.format(number)), 'wb') as f:
+			f.write(post.encode('utf-8'))
+
+	for number in xrange(pages):
+		with open(os.path.join(root, pages_dir,
+			'page-{}.md'.format(number)), 'wb') as f:
+			f.write(u'title: Page {}\n\n{}\n'.format(
+				number, get_words(rng, 200)).encode('utf-8'))
@@ -21,6 +21,7 @@ contents_dir = '_contents'
 posts_dir = 'posts'
 pages_dir = 'pages'
 content_extension = '.md'
+cache_dir = '.olaf-cache'
 
 
 def get_current_dir():
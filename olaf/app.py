@@ -10,28 +10,59 @@
 """
 
 import os
+import json
 import datetime
+import itertools
+import mimetypes
+import multiprocessing
 from urlparse import urljoin
-from collections import Counter, OrderedDict
+from collections import OrderedDict
 
+import pygments
 from flask import Flask
 from flask_frozen import Freezer
 from werkzeug.contrib.atom import AtomFeed
+from werkzeug.exceptions import NotFound
 from flask import render_template, abort, redirect, url_for, \
-	request, make_response, current_app, Blueprint, send_from_directory
-from flask_flatpages import FlatPages, pygments_style_defs
-
-from olaf import contents_dir, content_extension, get_current_dir
+	request, current_app, Blueprint, send_from_directory, \
+	safe_join, stream_with_context, g, jsonify
+from flask_flatpages import pygments_style_defs
+from markdown import markdown, version as markdown_version
+
+from olaf import contents_dir, content_extension, cache_dir, get_current_dir
+from olaf.assets import AssetManifest, fingerprint_max_age
+from olaf.cache import DiskCache, FileCache, ResponseCache, get_hash
+from olaf.highlight import highlight_cache, get_extensions
+from olaf.index import ContentIndex, is_valid_post
+from olaf.metrics import RequestMetrics, MetricsMiddleware, endpoint_key, \
+	content_type as metrics_content_type
+from olaf.pages import LazyFlatPages
+from olaf.profiler import profiler, ProfiledTemplate, ProfiledClient
+from olaf.related import get_related
+from olaf.reloader import get_watcher
+from olaf.search import SearchIndex
 from olaf.utils import timestamp_tostring, date_tostring, \
 	font_size, date_format, create_directory
 
 # initialize extensions
-freeze = Freezer()
-contents = FlatPages()
+freeze = Freezer(with_no_argument_rules=False)  # see `no_argument_urls`
+contents = LazyFlatPages()  # loads content body only when rendered
+content_index = ContentIndex()
+render_cache = DiskCache()  # rendered markdown cache
+file_cache = FileCache()  # site files read by views
+feed_cache = {}  # serialized atom feed, see `recent_feed`
+response_cache = ResponseCache()  # rendered responses, see `after_view`
+asset_manifest = AssetManifest(file_cache)  # fingerprinted asset names
+pygments_css_cache = {}  # pygments style -> stylesheet
+search_cache = DiskCache()  # tokenized posts keyed by content hash
+search_index = SearchIndex(search_cache)  # see `get_search_index`
+related_cache = {}  # related posts lists and content generation they are of
+request_metrics = RequestMetrics()  # see `MetricsMiddleware`
 
 app = Blueprint('app', __name__)  # create blueprint
 
 exclude_from_sitemap = []  # List of urls to be excluded from XML sitemap
+exclude_from_freeze = []  # url rules which are not frozen by default
 
 
 def create_app(current_path, theme_path, **kwargs):
@@ -60,10 +91,22 @@ def create_app(current_path, theme_path, **kwargs):
 		FREEZER_DESTINATION=freeze_path,
 		FREEZER_RELATIVE_URLS=freeze_static,
 		FREEZER_REMOVE_EXTRA_FILES=False,
-		FLATPAGES_AUTO_RELOAD=True,
+		FLATPAGES_AUTO_RELOAD=False,  # see `refresh_index`
 		FLATPAGES_EXTENSION=content_extension,
+		FLATPAGES_HTML_RENDERER=render_markdown,
 		FLATPAGES_ROOT=os.path.join(current_path, contents_dir))
 
+	# render cache size is given in megabytes
+	render_cache.init(
+		os.path.join(current_path, cache_dir, 'render'),
+		flask_app.config['SITE'].get('render_cache_size', 100) * 1024 * 1024)
+	highlight_cache.init(
+		os.path.join(current_path, cache_dir, 'highlight'),
+		flask_app.config['SITE'].get('highlight_cache_size', 20) * 1024 * 1024)
+	search_cache.init(
+		os.path.join(current_path, cache_dir, 'search'),
+		flask_app.config['SITE'].get('search_cache_size', 20) * 1024 * 1024)
+
 	# initialize with current flask app
 	contents.init_app(flask_app)
 	freeze.init_app(flask_app)
@@ -71,11 +114,69 @@ def create_app(current_path, theme_path, **kwargs):
 	# Register blueprint as root
 	flask_app.register_blueprint(app)
 
-	# check for duplicate slugs
-	check_duplicate_slugs(contents)
-
-	# filter contents for posts and pages only
-	filter_valid_contents(contents)
+	# index posts and pages, raises error on duplicate slugs
+	content_index.summary_length = flask_app.config['SITE'].get(
+		'summary_offset', 180)
+	contents.reload()  # forget pages loaded by previously created app
+	content_index.build(contents)
+	feed_cache.clear()
+	search_index.clear()  # built on first search, see `get_search_index`
+	related_cache.clear()
+
+	# time phases of building each url while freezing (optional)
+	profiler.enabled = bool(kwargs.get('profile'))
+	profiler.clear()
+	if profiler.enabled:
+		flask_app.jinja_env.template_class = ProfiledTemplate
+		flask_app.test_client_class = ProfiledClient
+
+	# render all contents upfront using a process pool (optional)
+	if kwargs.get('prerender_jobs'):
+		prerender_contents(kwargs['prerender_jobs'])
+
+	# watch contents in background and patch index with modified contents
+	watcher = get_watcher(contents.root, kwargs.get('reload_mode') or 'off')
+	if watcher:
+		flask_app.extensions['olaf_watcher'] = watcher
+		flask_app.before_request(refresh_index)
+
+	# request metrics in prometheus format (optional), recorded by
+	# a middleware so that latency includes streaming responses
+	request_metrics.clear()
+	if kwargs.get('metrics'):
+		metrics_path = flask_app.config['SITE'].get(
+			'metrics_path', '/_olaf/metrics')
+		flask_app.add_url_rule(metrics_path, 'olaf_metrics', metrics)
+		if metrics_path not in exclude_from_sitemap:
+			exclude_from_sitemap.append(metrics_path)
+
+		# runs before other hooks since they can return responses early
+		flask_app.before_request(record_endpoint)
+		flask_app.wsgi_app = MetricsMiddleware(
+			flask_app.wsgi_app, request_metrics)
+
+	# cache rendered responses in memory (optional),
+	# cache size is given in megabytes
+	response_cache.init(0)
+	if kwargs.get('cache_responses'):
+		response_cache.init(flask_app.config['SITE'].get(
+			'response_cache_size', 50) * 1024 * 1024)
+
+	# etag, last modified and cache control headers (optional)
+	flask_app.config['cache_headers'] = bool(kwargs.get('cache_headers'))
+	if flask_app.config['cache_headers']:
+		flask_app.config['site_version'] = get_site_version(
+			current_path, theme_path)
+
+	if response_cache.enabled or flask_app.config['cache_headers']:
+		flask_app.before_request(before_view)
+		flask_app.after_request(after_view)
+
+	# fingerprinted urls of static and assets files (enabled by default)
+	if flask_app.config['SITE'].get('fingerprint_assets', True):
+		flask_app.url_defaults(fingerprint_asset_url)
+		flask_app.url_value_preprocessor(resolve_asset_url)
+		flask_app.after_request(add_asset_headers)
 
 	with flask_app.app_context():
 		# Set home page
@@ -87,25 +188,326 @@ def create_app(current_path, theme_path, **kwargs):
 			date_tostring=date_tostring,
 			font_size=font_size,
 			content_type=check_content_type,
+			iter_posts=iter_posts,
 			date_format=date_format,
 			config=current_app.config)
 
 	return flask_app
 
 
-def filter_valid_contents(contents):
+def refresh_index():
+	"""
+	re-parse only content files reported by watcher and patch index,
+	requests do not scan contents directory
+	"""
+	watcher = current_app.extensions['olaf_watcher']
+	modified = False
+	for filename in watcher.pop_changes():
+		path, page = contents.reload_file(filename)
+		if path is not None:
+			# forget only responses depending on modified content
+			response_cache.invalidate(content_index.update(path, page))
+			modified = True
+
+	# related posts of any post can change with contents, responses
+	# cached before are of posts listed in related lists computed so far
+	if modified and response_cache.enabled and 'lists' in related_cache:
+		previous = related_cache['lists']
+		response_cache.invalidate(
+			get_related_keys(previous, get_related_lists()))
+
+
+def record_endpoint():
+	"""
+	pass endpoint of current request to metrics middleware
+	"""
+	request.environ[endpoint_key] = request.endpoint
+
+
+def metrics():
+	"""
+	request and cache metrics in prometheus text format
+	"""
+	caches = [
+		('render', render_cache.hits, render_cache.misses),
+		('highlight', highlight_cache.hits, highlight_cache.misses),
+		('response', response_cache.hits, response_cache.misses),
+		('feed', feed_cache.get('hits', 0), feed_cache.get('misses', 0)),
+		('search', search_cache.hits, search_cache.misses)]
+
+	return current_app.response_class(request_metrics.render(caches),
+		content_type=metrics_content_type)
+
+
+def is_cacheable_request():
+	"""
+	check if current request is a GET request to a blueprint view,
+	assets are served with their own cache headers from file cache
+	"""
+	return bool(request.method == 'GET' and request.endpoint and
+		request.endpoint.startswith('app.') and
+		request.endpoint != 'app.custom_static')
+
+
+def get_site_version(current_path, theme_path):
 	"""
-	filter contents to only post and pages and
-	add url attribute to individual content.
+	hash of modification times of config, disqus, theme and content files,
+	etags change across restarts only if any of these files changed
 	"""
-	contents = [post for post in contents if (
-		post.path.startswith('posts/') or
-		post.path.startswith('pages/'))]
+	site_files = [os.path.join(current_path, 'config.py'),
+		os.path.join(current_path, 'disqus.html')]
+	for root, dirs, files in os.walk(theme_path):
+		site_files.extend(os.path.join(root, name) for name in files)
+
+	versions = []
+	for path in sorted(site_files):
+		if os.path.isfile(path):
+			versions.append('{}:{}'.format(path, os.path.getmtime(path)))
+
+	# modification times of loaded contents, see FlatPages._load_file
+	for filename, (page, mtime) in sorted(contents._file_cache.items()):
+		versions.append(u'{}:{}'.format(filename, mtime))
+
+	return get_hash(*versions)
+
+
+def get_etag():
+	"""
+	etag of current request which can be computed before rendering,
+	derived from site version, content generation and url
+	"""
+	return get_hash(current_app.config['site_version'],
+		str(content_index.generation), request.url)
+
+
+def get_max_age():
+	"""
+	max-age of current view in seconds as per SITE max_age policy,
+	{view name: seconds} with optional default
+	"""
+	policy = current_app.config['SITE'].get('max_age') or {}
+	view = request.endpoint.split('.', 1)[-1]
+	return policy.get(view, policy.get('default', 0))
+
 
-	for post in contents:
-		if(post.path.startswith('posts/')
-			or post.path.startswith('pages/')):
-			post.slug = post.path[6:]
+def before_view():
+	"""
+	answer conditional requests before rendering, serve response from
+	response cache if found, otherwise track index lookups made
+	while rendering it
+	"""
+	content_index.tracked = None
+	if not is_cacheable_request():
+		return None
+
+	if current_app.config['cache_headers']:
+		etag = get_etag()
+		if etag in request.if_none_match:
+			response = current_app.response_class(status=304)
+			response.set_etag(etag)
+			response.cache_control.public = True
+			response.cache_control.max_age = get_max_age()
+			return response
+
+	if response_cache.enabled:
+		cached = response_cache.get(request.url)
+		if cached is not None:
+			data, status, headers = cached
+			response = current_app.response_class(data, status, headers)
+			return response.make_conditional(request)
+
+	content_index.tracked = set()
+
+
+def after_view(response):
+	"""
+	add etag, last modified date of contents used while rendering and
+	cache control headers, then cache successful responses tagged
+	with index lookups made while rendering them
+	"""
+	tracked = content_index.tracked
+	content_index.tracked = None
+
+	if tracked is None or response.status_code != 200:
+		return response
+
+	cache_headers = current_app.config['cache_headers']
+	if cache_headers:
+		if response.get_etag()[0] is None:
+			response.set_etag(get_etag())
+		if response.last_modified is None:
+			response.last_modified = content_index.last_modified(tracked)
+		response.cache_control.public = True
+		response.cache_control.max_age = get_max_age()
+
+	if (response_cache.enabled and
+		not response.is_streamed and not response.direct_passthrough):
+		data = response.get_data()
+		response_cache.set(request.url,
+			(data, response.status_code, response.headers.to_wsgi_list()),
+			len(data), tracked)
+
+	if cache_headers:
+		response = response.make_conditional(request)
+
+	return response
+
+
+def get_pygments_css():
+	"""
+	stylesheet of configured pygments style, generated once per style
+	and kept in memory and in render cache across runs
+	"""
+	style = current_app.config['SITE'].get('pygments_style') or 'tango'
+	css = pygments_css_cache.get(style)
+	if css is None:
+		key = get_hash('pygments.css', style, pygments.__version__)
+		css = render_cache.get(key)
+		if css is None:
+			css = pygments_style_defs(style)
+			render_cache.set(key, css)
+		pygments_css_cache[style] = css
+	return css
+
+
+def get_assets_path():
+	"""
+	custom assets folder
+	"""
+	return os.path.join(
+		get_current_dir(),
+		current_app.config['SITE'].get('assets') or 'assets')
+
+
+def get_asset_root(endpoint):
+	"""
+	get folder of files served by static or assets endpoint,
+	None for other endpoints
+	"""
+	if endpoint == 'static':
+		return current_app.static_folder
+	elif endpoint == 'app.custom_static':
+		return get_assets_path()
+	return None
+
+
+def fingerprint_asset_url(endpoint, values):
+	"""
+	add content hash to file names while building static and assets urls
+	and to pygments stylesheet url, url_for(..., fingerprint=False)
+	builds url with original file name
+	"""
+	if endpoint == 'app.pygments_css':
+		if values.pop('fingerprint', True):
+			values.setdefault('version', get_hash(get_pygments_css())[:10])
+		return
+
+	root = get_asset_root(endpoint)
+	if root is None or not values.pop('fingerprint', True):
+		return
+
+	filename = values.get('filename')
+	if filename:
+		if endpoint == 'app.custom_static':
+			content_index.track('asset:' + filename)  # see freezer
+		values['filename'] = asset_manifest.fingerprint(root, filename)
+
+
+def resolve_asset_url(endpoint, values):
+	"""
+	get original file name of fingerprinted static and assets urls
+	"""
+	root = get_asset_root(endpoint)
+	if root is None or not values or not values.get('filename'):
+		return
+
+	resolved = asset_manifest.resolve(root, values['filename'])
+	if resolved:
+		# outdated fingerprints are served but not cached for long
+		values['filename'], g.fingerprinted = resolved
+
+
+def add_asset_headers(response):
+	"""
+	fingerprinted files can be cached for long since
+	their urls change whenever they are modified
+	"""
+	if g.get('fingerprinted') and response.status_code == 200:
+		response.cache_control.public = True
+		response.cache_control.max_age = fingerprint_max_age
+	return response
+
+
+def get_render_key(body, flask_app):
+	"""
+	render cache key of a content body, markdown and pygments versions
+	are included since upgrading them can change rendered html
+	"""
+	return get_hash(body,
+		repr(flask_app.config['FLATPAGES_MARKDOWN_EXTENSIONS']),
+		flask_app.config['SITE'].get('pygments_style') or 'tango',
+		markdown_version, pygments.__version__)
+
+
+def render_body(args):
+	"""
+	render markdown body with given extensions,
+	codehilite is replaced by its cached version
+	"""
+	body, extensions = args
+	return markdown(body, extensions=get_extensions(extensions))
+
+
+def render_markdown(body, flatpages):
+	"""
+	render markdown to html, rendered html is cached on disk
+	keyed by body, markdown extensions and pygments style
+	"""
+	with profiler.phase('markdown'):
+		key = get_render_key(body, flatpages.app)
+		html = render_cache.get(key)
+		if html is None:
+			html = render_body((body, flatpages.config('markdown_extensions')))
+			render_cache.set(key, html)
+
+	return html
+
+
+def prerender_contents(jobs):
+	"""
+	render markdown of all contents not found in render cache
+	using a pool of worker processes and install rendered html on pages
+	"""
+	extensions = contents.config('markdown_extensions')
+
+	pending = []
+	for page in content_index:
+		key = get_render_key(page.read_body(), contents.app)
+		html = render_cache.get(key)
+		if html is None:
+			pending.append((page, key))
+		else:
+			page.__dict__['html'] = html  # see werkzeug cached_property
+
+	if not pending:
+		return
+
+	pool = multiprocessing.Pool(jobs)
+	try:
+		rendered = pool.imap(render_body,
+			((page.read_body(), extensions) for page, key in pending),
+			max(len(pending) // (jobs * 4), 1))
+
+		for (page, key), html in zip(pending, rendered):
+			render_cache.set(key, html)
+			page.__dict__['html'] = html
+
+		pool.close()
+	except:
+		pool.terminate()
+		raise
+	finally:
+		pool.join()
 
 
 def check_content_type(path, content_type):
@@ -123,22 +525,6 @@ def check_content_type(path, content_type):
 	return False
 
 
-def check_duplicate_slugs(contents):
-	"""
-	check for duplicate slugs
-	"""
-	slugs = []
-	for post in contents:
-		slug = ''
-		if post.path.startswith('pages/'):
-			slug = post.path.split('pages/')[1]
-		elif post.path.startswith('posts/'):
-			slug = post.path.split('posts/')[1]
-
-		if slug and slug in slugs:
-			raise ValueError('Duplicate slug : {}'.format())
-
-
 def get_posts(**filters):
 	"""
 	Filters posts
@@ -149,6 +535,9 @@ def get_posts(**filters):
 	'sort'		: boolean	:: sort by timestamp (default: True)
 	'reverse'	: boolean	:: Reverse the order (default: True)
 	'tag'		: string	:: Filters by tag name (default: None)
+	'year'		: integer	:: Filters by year (default: None)
+	'month'		: integer	:: Filters by month, only if year is
+								given (default: None)
 	'page_no'	: integer	:: Paginates results and returns result
 								according to page_no (default: None)
 	'limit'		: integer	:: Pagination limit (default: global limit)
@@ -156,39 +545,13 @@ def get_posts(**filters):
 								filtered results (default: False)
 	"""
 
-	posts = [post for post in contents if (
-		post.path.startswith('posts/') and
-		post.meta.get('date') and
-		post.meta.get('title'))]
-
-	# import pdb; pdb.set_trace()
-
-	# Filter conditions
-
-	# Sort posts by timestamp (True by default)
-	sort = filters.get('sort', True)
-	if(sort):
-		posts.sort(
-			key=lambda x: x.meta['date'],
-			reverse=filters.get('reverse', True))
-
-	# Filter based on tag
-	tag = filters.get('tag')
-	if(tag):
-		posts = [post for post in posts
-			if tag in (post.meta.get('tags') or [])]
-
-	# Filter based on year and month
-	year = filters.get('year')
-	if(year):
-		posts = [post for post in posts
-			if post.meta['date'].year == year]
-
-		# Filter by month only if year is given
-		month = filters.get('month')
-		if month:
-			posts = [post for post in posts
-				if post.meta['date'].month == month]
+	# Filter posts by tag, year and month (month only if year is given)
+	# from precomputed index, sorted by timestamp (True by default)
+	posts = content_index.query(
+		tag=filters.get('tag'),
+		year=filters.get('year'),
+		month=filters.get('month'),
+		reverse=filters.get('sort', True) and filters.get('reverse', True))
 
 	# Get total number of posts without pagination
 	post_meta = {}
@@ -196,15 +559,11 @@ def get_posts(**filters):
 
 	# Filter based on page number and pagination limit
 	page_no = filters.get('page_no')
-	limit = filters.get('limit') or current_app.config['SITE']['limit'] or 10
+	limit = filters.get('limit') or get_limit()
 	max_pages = 0
 	if(page_no):
-		paginated = [posts[n:n + limit] for n in range(0, len(posts), limit)]
-		max_pages = len(paginated)
-		try:
-			posts = paginated[page_no - 1]
-		except IndexError:
-			posts = []
+		max_pages = get_max_pages(len(posts), limit)
+		posts = posts.page(page_no, limit)
 
 	post_meta['max_pages'] = max_pages
 
@@ -212,15 +571,41 @@ def get_posts(**filters):
 	if not posts and filters.get('abort') is True:
 		abort(404)
 
-	return (posts, post_meta)
+	return (list(posts), post_meta)
+
+
+def get_limit():
+	"""
+	global pagination limit
+	"""
+	return current_app.config['SITE']['limit'] or 10
+
+
+def get_max_pages(total, limit=None):
+	"""
+	number of pages needed to paginate total posts
+	"""
+	limit = limit or get_limit()
+	return (total + limit - 1) // limit
+
+
+def iter_posts(tag=None, year=None, month=None, offset=0, limit=None,
+	reverse=True):
+	"""
+	Lazily iterate over filtered posts, latest first by default.
+	Returns a cursor which fetches posts only while iterating,
+	used by feeds and templates to stream a window of posts.
+	"""
+	posts = content_index.query(
+		tag=tag, year=year, month=month, reverse=reverse)
+	return posts.window(offset, limit)
 
 
 def get_post_by_slug(slug):
 	"""
-	filter contents by slug
+	get post or page by slug, returns None if slug not found
 	"""
-	content = [post for post in contents if post.slug == slug]
-	return content
+	return content_index.get(slug)
 
 
 """
@@ -237,12 +622,17 @@ def custom_404():
 
 
 @app.route('/pygments.css')
-def pygments_css():
+@app.route('/pygments.<version>.css')
+def pygments_css(version=None):
 	"""
-	default pygments style
+	default pygments style, versioned url contains hash of stylesheet
 	"""
-	pyments_style = current_app.config['SITE'].get('pygments_style') or 'tango'
-	return (pygments_style_defs(pyments_style), 200, {'Content-Type': 'text/css'})
+	css = get_pygments_css()
+	response = current_app.response_class(css, mimetype='text/css')
+	if version == get_hash(css)[:10]:
+		response.cache_control.public = True
+		response.cache_control.max_age = fingerprint_max_age
+	return response
 
 exclude_from_sitemap.append('/pygments.css')  # Excludes url from sitemap
 
@@ -252,16 +642,31 @@ def custom_static(filename):
 	"""
 	custom assets folder
 	"""
-	# custom assets folder
-	assets_path = os.path.join(
-		get_current_dir(),
-		current_app.config['SITE'].get('assets') or 'assets')
+	assets_path = get_assets_path()
 
 	# create assets folder if not there
-	if not os.path.exists(assets_path):
+	if not file_cache.isdir(assets_path):
 		create_directory(assets_path)
+		file_cache.invalidate(assets_path)
+
+	try:
+		file_path = safe_join(assets_path, filename)
+	except NotFound:
+		abort(404)
+
+	# serve small files from memory, others are sent from disk
+	content = file_cache.read(file_path)
+	if content is None:
+		return send_from_directory(assets_path, filename)
 
-	return send_from_directory(assets_path, filename)
+	mtime, size, is_dir = file_cache.stat(file_path)
+	response = current_app.response_class(content,
+		mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+	response.last_modified = mtime
+	response.cache_control.public = True
+	response.cache_control.max_age = current_app.get_send_file_max_age(filename)
+	response.set_etag('{}-{}'.format(mtime, size))
+	return response.make_conditional(request)
 
 
 def get_index():
@@ -272,13 +677,9 @@ def get_index():
 		content = get_post_by_slug(current_app.config['SITE']['custom_home_page'])
 
 		# Exception if slug not found both in pages and posts
-		if not content:
+		if content is None:
 			raise Exception('Custom home page url not found')
 
-		# Exception if duplicates found
-		if len(content) > 1:
-			raise Exception('Duplicate slug')
-
 		return custom_index
 	else:
 		return default_index
@@ -298,8 +699,8 @@ def custom_index():
 	custom home page view
 	"""
 	content = get_post_by_slug(current_app.config['SITE']['custom_home_page'])
-	content[0].meta['type'] = 'page'
-	return render_template('content.html', content=content[0])
+	content.meta['type'] = 'page'
+	return render_template('content.html', content=content)
 
 
 @app.route('/pages/<int:page_no>/')
@@ -324,20 +725,18 @@ def posts(slug):
 	"""
 	content = get_post_by_slug(slug)
 
-	if not content:
+	if content is None:
 		abort(404)  # Slug not found both in pages and posts
 
 	# Exception if duplicates found
-	if len(content) > 1:
+	if slug in content_index.duplicates:
 		raise Exception('Duplicate slug')
 
-	disqus_html = ''
 	disqus_file_path = os.path.join(current_app.config['current_path'], 'disqus.html')
-	with open(disqus_file_path, 'r') as f:
-		disqus_html = f.read()
+	disqus_html = (file_cache.read(disqus_file_path) or '').decode('utf-8')
 
-	return render_template('content.html', content=content[0],
-		disqus_html=disqus_html)
+	return render_template('content.html', content=content,
+		disqus_html=disqus_html, related_posts=get_related_posts(content))
 
 
 # Tag views
@@ -347,11 +746,7 @@ def tags():
 	"""
 	list of tags view
 	"""
-	# import pdb; pdb.set_trace()
-	tags = [tag for post in contents if post.meta.get('tags')
-		for tag in post.meta['tags']]
-
-	tags = sorted(Counter(tags).items())  # Count tag occurances
+	tags = content_index.tag_counts()  # Count tag occurances
 
 	max_occ = 0 if not tags else max([tag[1] for tag in tags])
 
@@ -390,7 +785,7 @@ def list_posts():
 	"""
 	all posts list view
 	"""
-	return render_template("list_posts.html", posts=get_posts()[0])
+	return render_template("list_posts.html", posts=iter_posts())
 
 
 @app.route('/list/pages/')
@@ -398,8 +793,7 @@ def list_pages():
 	"""
 	all pages list view
 	"""
-	pages = [page for page in contents
-				if page.path.startswith('pages/')]
+	pages = content_index.pages()
 
 	return render_template("list_pages.html", pages=pages)
 
@@ -409,23 +803,12 @@ def archive():
 	"""
 	date based archive view
 	"""
-	# Get all posts dates in format (year, month)
-	dates = [(post.meta['date'].year, post.meta['date'].month)
-			for post in contents if post.meta.get('date')]
-
-	# Get sorted yearly archive lists ex: [(year, no_occur), ...]
-	yearly = sorted(Counter([date[0] for date in dates]).items(), reverse=True)
-
-	# Get sorted yearly and monthly archive lists [((year, month), no_occur), ...]
-	monthly = sorted(Counter([date for date in dates]).items(), reverse=True)
-
+	# Get yearly and monthly post counts from index, latest first
 	yearly_dict = OrderedDict()
-	for i in yearly:
-		year = i[0]
+	for year, count, months in content_index.archive_counts():
 		yearly_dict[year] = {}
-		yearly_dict[year]['count'] = i[1]
-		yearly_dict[year]['months'] = [(j[0][1], j[1])
-				for j in monthly if j[0][0] == year]
+		yearly_dict[year]['count'] = count
+		yearly_dict[year]['months'] = months
 
 	return render_template('archive.html', archive=yearly_dict)
 
@@ -453,21 +836,41 @@ def monthly_archive(year, month):
 @app.route('/recent.atom')
 def recent_feed():
 	"""
-	atom feed generator
+	atom feed generator, serialized feed is cached till contents change
 	"""
-	posts, max_page = get_posts()
-	feed_limit = current_app.config['SITE'].get('feed_limit', 10)
-
 	domain_url = current_app.config['SITE'].get('domain_url')
 	if not domain_url:
 		domain_url = request.url_root
 
+	key = (content_index.generation, domain_url)
+	if feed_cache.get('key') != key:
+		feed_cache.update(build_feed(domain_url), key=key)
+		feed_cache['misses'] = feed_cache.get('misses', 0) + 1
+	else:
+		content_index.track('posts')  # feed depends on all posts
+		feed_cache['hits'] = feed_cache.get('hits', 0) + 1
+
+	response = current_app.response_class(
+		feed_cache['data'], mimetype='application/atom+xml')
+	response.set_etag(feed_cache['etag'])
+	if feed_cache['updated']:
+		response.last_modified = feed_cache['updated']
+	return response.make_conditional(request)
+
+
+def build_feed(domain_url):
+	"""
+	build atom feed of recent posts,
+	returns dict with serialized feed, its etag and last updated time
+	"""
+	feed_limit = current_app.config['SITE'].get('feed_limit', 10)
+
 	feed = AtomFeed('Recent Articles',
 					url=domain_url,
 					feed_url=urljoin(domain_url, '/recent.atom'),
 					id=urljoin(domain_url, '/recent.atom'))
 
-	for post in posts[:feed_limit]:
+	for post in iter_posts(limit=feed_limit):
 		dated = post.meta['date']
 		updated = dated
 		if post.meta.get('updated'):
@@ -495,42 +898,250 @@ def recent_feed():
 			published=dated,
 			xml_base=urljoin(domain_url, '/recent.atom'))
 
-	return feed.get_response()
+	data = feed.to_string().encode('utf-8')
+	updated = max(entry.updated for entry in feed.entries) \
+		if feed.entries else None
+
+	return dict(data=data, etag=get_hash(data), updated=updated)
 
 
 @app.route('/sitemap.xml', methods=['GET'])
 def sitemap():
 	"""
-	XML sitemap generator
+	XML sitemap generator, sitemap index is served instead
+	if urls do not fit in a single sitemap
+	"""
+	if get_sitemap_shards() > 1:
+		return sitemap_index()
+
+	return get_sitemap_response(iter_sitemap_resources())
+
+
+@app.route('/sitemap-index.xml', methods=['GET'])
+def sitemap_index():
+	"""
+	XML sitemap index of sitemap shards, not found
+	if urls fit in a single sitemap
+	"""
+	shards = get_sitemap_shards()
+	if shards < 2:
+		abort(404)
+
+	domain_url = current_app.config['SITE'].get('domain_url')
+	if not domain_url:
+		domain_url = request.url_root
+
+	def generate():
+		yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+			'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+		for shard in xrange(1, shards + 1):
+			yield '    <sitemap><loc>{}</loc></sitemap>\n'.format(
+				urljoin(domain_url, url_for('app.sitemap_shard', shard=shard)))
+		yield '</sitemapindex>\n'
+
+	return current_app.response_class(
+		stream_with_context(generate()), mimetype='application/xml')
+
+
+@app.route('/sitemap-<int:shard>.xml', methods=['GET'])
+def sitemap_shard(shard):
+	"""
+	XML sitemap of a shard of urls (starts from 1), not found
+	if urls fit in a single sitemap
+	"""
+	shards = get_sitemap_shards()
+	if shards < 2 or not 1 <= shard <= shards:
+		abort(404)
+
+	limit = get_sitemap_limit()
+	return get_sitemap_response(itertools.islice(
+		iter_sitemap_resources(), (shard - 1) * limit, shard * limit))
+
+exclude_from_sitemap.extend(['/sitemap.xml', '/sitemap-index.xml'])
+# frozen only if urls do not fit in a single sitemap, see `content_urls`
+exclude_from_freeze.extend(['/sitemap-index.xml', '/sitemap-<int:shard>.xml'])
+
+
+def get_search_index():
+	"""
+	full-text search index of posts, patched with posts
+	modified since contents index last changed
+	"""
+	posts = content_index.query()  # search results depend on all posts
+	if search_index.generation != content_index.generation:
+		search_index.sync(posts)
+		search_index.generation = content_index.generation
+	return search_index
+
+
+def get_related_lists():
+	"""
+	get {path: [related paths]} of all posts, empty if related posts are
+	disabled. Related posts of all posts are computed at once whenever
+	contents change and kept on post objects.
+	"""
+	limit = current_app.config['SITE'].get('related_posts', 5)
+	if not limit:
+		return {}
+
+	if related_cache.get('generation') != content_index.generation:
+		# lists depend on all posts, changed lists are found by comparing
+		# them with previous lists instead, see `get_related_keys`
+		tracked, content_index.tracked = content_index.tracked, None
+		try:
+			index = get_search_index()
+			related = get_related(index, content_index.tags, limit)
+		finally:
+			content_index.tracked = tracked
+
+		for path, page in index.pages.iteritems():
+			page.related = [index.pages[other] for other in related[path]]
+		related_cache['lists'] = related
+		related_cache['generation'] = content_index.generation
+
+	return related_cache['lists']
+
+
+def get_related_keys(old_lists, new_lists):
+	"""
+	get dependency keys of posts whose related posts lists changed
+	"""
+	return set('content:' + path for path in set(old_lists) | set(new_lists)
+		if old_lists.get(path) != new_lists.get(path))
+
+
+def get_related_posts(post):
+	"""
+	related posts of a post, post page depends on posts it lists
+	"""
+	if not is_valid_post(post) or post.path not in get_related_lists():
+		return []
+
+	content_index.track(*['content:' + page.path for page in post.related])
+	return post.related
+
+
+def get_json_response(data):
+	"""
+	compact json response with sorted keys so that output
+	is same for same data
+	"""
+	return current_app.response_class(
+		json.dumps(data, sort_keys=True, separators=(',', ':')),
+		mimetype='application/json')
+
+
+@app.route('/search')
+def search():
+	"""
+	search posts by title, tags and content, ranked by relevance
+	"""
+	query = request.args.get('q', '').strip()
+	limit = current_app.config['SITE'].get('search_limit', 20)
+	index = get_search_index()
+
+	results = []
+	for path, score in index.search(query, limit):
+		post = index.pages[path]
+		results.append({
+			'url': url_for('app.posts', slug=post.slug),
+			'title': post.meta['title'],
+			'summary': post.meta.get('summary') or post.info.summary,
+			'date': post.meta['date'].isoformat(),
+			'score': round(score, 4)
+		})
+
+	return jsonify(query=query, results=results)
+
+exclude_from_sitemap.append('/search')
+exclude_from_freeze.append('/search')  # depends on query string
+
+
+@app.route('/search/index.json')
+def search_index_json():
+	"""
+	search index metadata and list of posts used by clients of
+	frozen sites, posts are referred by their position in shards
+	"""
+	index = get_search_index()
+	paths, shards = index.export()
+
+	docs = []
+	for path in paths:
+		post = index.pages[path]
+		docs.append({
+			'url': url_for('app.posts', slug=post.slug),
+			'title': post.meta['title'],
+			'length': index.docs[path][1]
+		})
+
+	data = index.settings()
+	data.update(docs=docs, shards=sorted(shards))
+	return get_json_response(data)
+
+exclude_from_sitemap.append('/search/index.json')
+
+
+@app.route('/search/<prefix>.json')
+def search_shard(prefix):
+	"""
+	postings of search terms starting with given prefix
+	"""
+	paths, shards = get_search_index().export()
+	if prefix not in shards:
+		abort(404)
+
+	return get_json_response(shards[prefix])
+
+
+def get_sitemap_limit():
+	"""
+	maximum number of urls in a sitemap, 50000 as per sitemap protocol
+	"""
+	return current_app.config['SITE'].get('sitemap_limit', 50000)
+
+
+def get_sitemap_rules():
+	"""
+	url rules without arguments to be listed in sitemap
 	"""
-	resources = []
+	return [rule for rule in current_app.url_map.iter_rules()
+		if "GET" in rule.methods and len(rule.arguments) == 0 and
+		rule.rule not in exclude_from_sitemap]
 
+
+def get_sitemap_shards():
+	"""
+	number of sitemaps needed to list all urls
+	"""
+	content_index.track('posts', 'pages')
+	total = len(get_sitemap_rules()) + len(content_index)
+	limit = get_sitemap_limit()
+	return max((total + limit - 1) // limit, 1)
+
+
+def iter_sitemap_resources():
+	"""
+	generate {'url': url, 'modified': last modified date}
+	of static pages and contents
+	"""
 	# Set last updated date for static pages as 10 days before
 	ten_days_ago = (
 		datetime.datetime.now() -
 		datetime.timedelta(days=10)).date().isoformat()
 
-	# import pdb; pdb.set_trace()
-
 	domain_url = current_app.config['SITE'].get('domain_url')
 	if not domain_url:
 		domain_url = request.url_root
 
 	# Add static pages
-	for rule in current_app.url_map.iter_rules():
-		if ("GET" in rule.methods and len(rule.arguments) == 0 and
-			rule.rule not in exclude_from_sitemap):
-			resources.append(
-				{
-					'url': urljoin(domain_url, rule.rule),
-					'modified': ten_days_ago
-				}
-			)
-
-	# Add posts
-	posts, max_page = get_posts()
-
-	for content in contents:
+	for rule in get_sitemap_rules():
+		yield {
+			'url': urljoin(domain_url, rule.rule),
+			'modified': ten_days_ago
+		}
+
+	for content in content_index:
 		# Get post update or creation date
 		if content.meta.get('updated'):
 			updated = content.meta['updated'].isoformat()
@@ -540,15 +1151,99 @@ def sitemap():
 			updated = ten_days_ago
 
 		# Add posts url
-		resources.append(
-			{
-				'url': urljoin(domain_url, content.slug),
-				'modified': updated
-			}
-		)
+		yield {
+			'url': urljoin(domain_url, content.slug),
+			'modified': updated
+		}
 
-	sitemap_xml = render_template('sitemap.xml', resources=resources)
-	response = make_response(sitemap_xml)
-	response.headers["Content-Type"] = "application/xml"
 
-	return response
+def get_sitemap_response(resources):
+	"""
+	stream sitemap template rendered with given resources
+	"""
+	context = {'resources': resources}
+	current_app.update_template_context(context)
+	template = current_app.jinja_env.get_template('sitemap.xml')
+
+	return current_app.response_class(
+		stream_with_context(template.generate(context)),
+		mimetype='application/xml')
+
+
+"""
+Freezer url generators
+"""
+
+
+@freeze.register_generator
+def no_argument_urls():
+	"""
+	urls of views without arguments except the ones
+	which cannot be frozen, see `exclude_from_freeze`
+	"""
+	for rule in current_app.url_map.iter_rules():
+		if (not rule.arguments and 'GET' in rule.methods and
+			rule.rule not in exclude_from_freeze):
+			yield rule.endpoint, {}
+
+
+@freeze.register_generator
+def content_urls():
+	"""
+	urls of all posts, pages, tags, archives and paginations,
+	generated upfront so that freezing can be shared across workers
+	"""
+	for content in content_index:
+		yield 'app.posts', {'slug': content.slug}
+
+	# first page redirects to index unless custom home page is set
+	first_page = 1 if current_app.config['SITE'].get('custom_home_page') else 2
+	for page_no in range(first_page, get_max_pages(len(content_index.posts)) + 1):
+		yield 'app.pagination', {'page_no': page_no}
+
+	for tag, tag_posts in content_index.tags.items():
+		yield 'app.tag_page', {'tag': tag}
+		for page_no in range(2, get_max_pages(len(tag_posts)) + 1):
+			yield 'app.tag_pages', {'tag': tag, 'page_no': page_no}
+
+	for year, year_count, months in content_index.archive_counts():
+		yield 'app.yearly_archive', {'year': year}
+		for month, month_count in months:
+			yield 'app.monthly_archive', {'year': year, 'month': month}
+
+	# sitemap index and shards exist only if urls do not fit in one sitemap
+	shards = get_sitemap_shards()
+	if shards > 1:
+		yield 'app.sitemap_index', {}
+		for shard in range(1, shards + 1):
+			yield 'app.sitemap_shard', {'shard': shard}
+
+	paths, shards = get_search_index().export()
+	for prefix in sorted(shards):
+		yield 'app.search_shard', {'prefix': prefix}
+
+
+@freeze.register_generator
+def asset_urls():
+	"""
+	urls of all files in assets folder. If fingerprinting is enabled,
+	static and assets files and pygments stylesheet are also written with
+	their original names since contents and stylesheets can refer them
+	directly.
+	"""
+	fingerprint = current_app.config['SITE'].get('fingerprint_assets', True)
+
+	roots = [('app.custom_static', get_assets_path())]
+	if fingerprint:
+		roots.append(('static', current_app.static_folder))
+		yield 'app.pygments_css', {'fingerprint': False}
+
+	for endpoint, root in roots:
+		for current_path, dirs, files in os.walk(root):
+			for name in files:
+				filename = os.path.relpath(
+					os.path.join(current_path, name), root).replace(os.sep, '/')
+				if endpoint != 'static':
+					yield endpoint, {'filename': filename}
+				if fingerprint:
+					yield endpoint, {'filename': filename, 'fingerprint': False}
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+	Olaf
+	~~~~~~~~~
+
+	Asset fingerprinting, urls of static and assets files contain hash of
+	file contents so that browsers can cache them for a long time
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import re
+import posixpath
+
+from olaf.cache import get_file_hash
+
+# fingerprinted file name, name.<hash>.extension
+fingerprint_re = re.compile(r'^(.+)\.([0-9a-f]{10})(\.[^./]+)?$')
+
+# max-age of fingerprinted files (one year)
+fingerprint_max_age = 365 * 24 * 60 * 60
+
+
+class AssetManifest(object):
+	"""
+	Mapping of asset file names to fingerprinted file names, file hashes
+	are computed once and revalidated using file cache
+	"""
+
+	def __init__(self, file_cache):
+		self.file_cache = file_cache
+		self._hashes = {}  # path -> (stat key, hash)
+
+	def get_hash(self, path):
+		"""
+		get short content hash of a file, None if file does not exist
+		"""
+		stat = self.file_cache.stat(path)
+		if stat is None or stat[2]:
+			return None
+
+		cached = self._hashes.get(path)
+		if cached and cached[0] == stat:
+			return cached[1]
+
+		try:
+			file_hash = get_file_hash(path).hexdigest()[:10]
+		except IOError:
+			return None
+
+		self._hashes[path] = (stat, file_hash)
+		return file_hash
+
+	def fingerprint(self, root, filename):
+		"""
+		get fingerprinted name of a file relative to root,
+		file name is returned as such if file does not exist
+		"""
+		file_hash = self.get_hash(os.path.join(root, *filename.split('/')))
+		if file_hash is None:
+			return filename
+
+		name, extension = posixpath.splitext(filename)
+		return '{}.{}{}'.format(name, file_hash, extension)
+
+	def resolve(self, root, filename):
+		"""
+		get (original name, current) of a fingerprinted file name where
+		current is False if hash in name is not hash of file contents.
+		None if file name is not fingerprinted or such file exists in root
+		"""
+		match = fingerprint_re.match(filename)
+		if not match:
+			return None
+
+		if self.file_cache.exists(os.path.join(root, *filename.split('/'))):
+			return None
+
+		original = match.group(1) + (match.group(3) or '')
+		file_hash = self.get_hash(os.path.join(root, *original.split('/')))
+		return (original, file_hash == match.group(2))
+
+	def get_manifest(self, root, prefix=''):
+		"""
+		get {file name: fingerprinted file name} of all files under root,
+		file names are prefixed with given url prefix
+		"""
+		manifest = {}
+		for current_path, dirs, files in os.walk(root):
+			for name in files:
+				filename = os.path.relpath(
+					os.path.join(current_path, name), root).replace(os.sep, '/')
+				manifest[prefix + filename] = \
+					prefix + self.fingerprint(root, filename)
+		return manifest
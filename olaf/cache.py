@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+	Olaf
+	~~~~~~~~~
+
+	Caches used to avoid repeating expensive work across runs
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import time
+import hashlib
+import tempfile
+from stat import S_ISDIR
+from collections import OrderedDict
+
+from olaf.utils import create_directory
+
+
+def get_hash(*parts):
+	"""
+	sha1 hex digest of given unicode or byte strings
+	"""
+	hash_obj = hashlib.sha1()
+	for part in parts:
+		if isinstance(part, unicode):
+			part = part.encode('utf-8')
+		hash_obj.update(part)
+		hash_obj.update('\0')
+	return hash_obj.hexdigest()
+
+
+def get_file_hash(path, hash_obj=None):
+	"""
+	update hash object with file contents and return it
+	"""
+	hash_obj = hash_obj or hashlib.sha1()
+	with open(path, 'rb') as f:
+		for block in iter(lambda: f.read(65536), b''):
+			hash_obj.update(block)
+	return hash_obj
+
+
+class DiskCache(object):
+	"""
+	Content addressed on-disk cache of unicode strings with
+	size bounded eviction of least recently used entries.
+	Entries are written atomically so caches can be shared by processes.
+	"""
+
+	def __init__(self, path=None, max_size=0):
+		self.init(path, max_size)
+
+	def init(self, path, max_size):
+		"""
+		set cache directory and maximum size in bytes,
+		cache is disabled if path or max_size is not set
+		"""
+		self.path = path
+		self.max_size = max_size
+		self.hits = 0
+		self.misses = 0
+		self._size = None  # computed on first write
+
+	@property
+	def enabled(self):
+		return bool(self.path and self.max_size)
+
+	def get_path(self, key):
+		return os.path.join(self.path, key[:2], key)
+
+	def get(self, key):
+		"""
+		get cached value or None if not found
+		"""
+		if not self.enabled:
+			return None
+
+		path = self.get_path(key)
+		try:
+			with open(path, 'rb') as f:
+				value = f.read().decode('utf-8')
+		except IOError:
+			self.misses += 1
+			return None
+
+		# update modification time to keep recently used entries on eviction
+		try:
+			os.utime(path, None)
+		except OSError:
+			pass
+
+		self.hits += 1
+		return value
+
+	def set(self, key, value):
+		"""
+		store value and evict old entries if cache is full
+		"""
+		if not self.enabled:
+			return
+
+		path = self.get_path(key)
+		data = value.encode('utf-8')
+
+		try:
+			directory = create_directory(os.path.dirname(path))
+			fd, temp_path = tempfile.mkstemp(dir=directory)
+			with os.fdopen(fd, 'wb') as f:
+				f.write(data)
+			os.rename(temp_path, path)
+		except (IOError, OSError):
+			return
+
+		if self._size is None:
+			self._size = sum(size for path, size, mtime in self.entries())
+		else:
+			self._size += len(data)
+
+		if self._size > self.max_size:
+			self.evict()
+
+	def entries(self):
+		"""
+		iterate over (path, size, modified time) of cached entries
+		"""
+		if not os.path.isdir(self.path):
+			return
+
+		for root, dirs, files in os.walk(self.path):
+			for name in files:
+				path = os.path.join(root, name)
+				try:
+					stat = os.stat(path)
+				except OSError:
+					continue
+				yield (path, stat.st_size, stat.st_mtime)
+
+	def evict(self):
+		"""
+		remove least recently used entries until cache is
+		within 90% of maximum size
+		"""
+		entries = sorted(self.entries(), key=lambda entry: entry[2])
+		size = sum(entry[1] for entry in entries)
+		limit = self.max_size * 0.9
+
+		for path, entry_size, mtime in entries:
+			if size <= limit:
+				break
+			try:
+				os.remove(path)
+			except OSError:
+				continue
+			size -= entry_size
+
+		self._size = size
+
+
+class FileCache(object):
+	"""
+	In-memory cache of site files which is revalidated by stat
+	at most once every `interval` seconds or when invalidated
+	"""
+
+	def __init__(self, interval=1, max_file_size=1024 * 1024):
+		self.interval = interval
+		self.max_file_size = max_file_size
+		self._entries = {}  # path -> see `_get_entry`
+
+	def invalidate(self, path=None):
+		"""
+		forget cached path or all paths if not given
+		"""
+		if path is None:
+			self._entries.clear()
+		else:
+			self._entries.pop(path, None)
+
+	def _get_entry(self, path, read):
+		"""
+		get (checked time, stat key, content, content loaded) of path,
+		stat key is (mtime, size, is directory) or None if path does not exist
+		"""
+		now = time.time()
+		entry = self._entries.get(path)
+		if entry and now - entry[0] < self.interval and (entry[3] or not read):
+			return entry
+
+		try:
+			stat = os.stat(path)
+		except OSError:
+			stat_key = None
+		else:
+			stat_key = (stat.st_mtime, stat.st_size, S_ISDIR(stat.st_mode))
+
+		content = None
+		loaded = False
+		if entry and entry[1] == stat_key:
+			content, loaded = entry[2], entry[3]
+
+		if read and not loaded:
+			loaded = True
+			if (stat_key and not stat_key[2] and
+				stat_key[1] <= self.max_file_size):
+				try:
+					with open(path, 'rb') as f:
+						content = f.read()
+				except IOError:
+					pass
+
+		entry = (now, stat_key, content, loaded)
+		self._entries[path] = entry
+		return entry
+
+	def stat(self, path):
+		"""
+		get (mtime, size, is directory) of path or None if it does not exist
+		"""
+		return self._get_entry(path, False)[1]
+
+	def exists(self, path):
+		return self.stat(path) is not None
+
+	def isdir(self, path):
+		stat = self.stat(path)
+		return bool(stat and stat[2])
+
+	def read(self, path):
+		"""
+		get file content, None if file does not exist or
+		is larger than `max_file_size`
+		"""
+		return self._get_entry(path, True)[2]
+
+
+class ResponseCache(object):
+	"""
+	In-memory cache of rendered responses bounded by total size in bytes,
+	least recently used entries are evicted first. Entries are tagged with
+	index lookup keys used while rendering them so that a content change
+	only invalidates entries depending on it.
+	"""
+
+	def __init__(self, max_size=0):
+		self.init(max_size)
+
+	def init(self, max_size):
+		"""
+		set maximum size in bytes and forget all entries,
+		cache is disabled if max_size is not set
+		"""
+		self.max_size = max_size
+		self.hits = 0
+		self.misses = 0
+		self.size = 0
+		self._entries = OrderedDict()  # url -> (value, size, keys)
+		self._urls = {}  # lookup key -> set of urls
+
+	@property
+	def enabled(self):
+		return bool(self.max_size)
+
+	def __len__(self):
+		return len(self._entries)
+
+	def get(self, url):
+		"""
+		get cached value or None if not found
+		"""
+		entry = self._entries.pop(url, None)
+		if entry is None:
+			self.misses += 1
+			return None
+
+		# move to end as most recently used
+		self._entries[url] = entry
+		self.hits += 1
+		return entry[0]
+
+	def set(self, url, value, size, keys):
+		"""
+		store value of given size tagged with lookup keys,
+		values larger than maximum size are not stored
+		"""
+		if not self.enabled or size > self.max_size:
+			return
+
+		self.remove(url)
+		self._entries[url] = (value, size, keys)
+		self.size += size
+		for key in keys:
+			self._urls.setdefault(key, set()).add(url)
+
+		while self.size > self.max_size:
+			self.remove(next(iter(self._entries)))
+
+	def remove(self, url):
+		"""
+		remove a single entry, does nothing if url is not cached
+		"""
+		entry = self._entries.pop(url, None)
+		if entry is None:
+			return
+
+		value, size, keys = entry
+		self.size -= size
+		for key in keys:
+			urls = self._urls.get(key)
+			if urls is not None:
+				urls.discard(url)
+				if not urls:
+					del self._urls[key]
+
+	def invalidate(self, keys):
+		"""
+		remove entries tagged with any of given lookup keys
+		"""
+		for key in keys:
+			for url in list(self._urls.get(key, ())):
+				self.remove(url)
@@ -16,10 +16,15 @@ import shutil
 import click
 
 from olaf.utils import slugify
-from olaf import app, module_path, get_current_dir, contents_dir, \
+from olaf.tools import freezer
+from olaf.reloader import reload_modes
+from olaf import app, module_path, get_current_dir, contents_dir, cache_dir, \
 	is_valid_path, is_valid_site, get_themes_list, get_theme_by_name, \
 	get_default_theme_name, create_project_site
 
+# trace written by freeze --profile to site cache directory
+profile_trace_name = 'freeze-trace.json'
+
 
 @click.group()
 def cli():
@@ -78,7 +83,15 @@ def createsite(project_name, demo):
 @click.option(
 	'-h', '--host', default='localhost',
 	help='hostname to run (default: localhost)')
-def run(theme, port, host):
+@click.option(
+	'--prerender', default=0, type=click.IntRange(0),
+	help='number of processes used to render all contents '
+	'before serving (default: 0, disabled)')
+@click.option(
+	'--reload-mode', default='watch', type=click.Choice(reload_modes),
+	help='reload modified contents using inotify (watch), a polling thread '
+	'(poll) or not at all (off) (default: watch)')
+def run(theme, port, host, prerender, reload_mode):
 	"""
 	run olaf local server
 	"""
@@ -99,7 +112,9 @@ def run(theme, port, host):
 		sys.exit(1)
 
 	try:
-		app_ = app.create_app(get_current_dir(), theme_path)
+		app_ = app.create_app(get_current_dir(), theme_path,
+			prerender_jobs=prerender, reload_mode=reload_mode,
+			cache_responses=True, cache_headers=True, metrics=True)
 		app_.run(port=port, host=host)
 	except ValueError as e:
 		click.secho(e, fg='red')
@@ -115,7 +130,33 @@ def run(theme, port, host):
 @click.option(
 	'-s', '--static', is_flag=True, help='Freeze with relative urls'
 	'(Run without web server) (default: False)')
-def freeze(theme, path, static):
+@click.option(
+	'-j', '--jobs', default=1, type=click.IntRange(1),
+	help='number of parallel freeze workers (default: 1)')
+@click.option(
+	'--full', is_flag=True, help='Rebuild all pages instead of only '
+	'pages affected by modified contents (default: False)')
+@click.option(
+	'--prerender', default=0, type=click.IntRange(0),
+	help='number of processes used to render all contents '
+	'before freezing (default: 0, disabled)')
+@click.option(
+	'--compress', is_flag=True, help='Write gzip (and brotli if installed) '
+	'compressed copies of text files (default: False)')
+@click.option(
+	'--compress-jobs', default=0, type=click.IntRange(0),
+	help='number of processes used by --compress '
+	'(default: 0, one per CPU)')
+@click.option(
+	'--profile', is_flag=True, help='Report slowest urls with time spent '
+	'loading contents, rendering markdown and templates and writing files, '
+	'and write a chrome trace to {} (default: False)'.format(
+		os.path.join(cache_dir, profile_trace_name)))
+@click.option(
+	'--profile-top', default=20, type=click.IntRange(1),
+	help='number of slowest urls reported by --profile (default: 20)')
+def freeze(theme, path, static, jobs, full, prerender, compress,
+	compress_jobs, profile, profile_top):
 	"""
 	freeze blog to static files
 	"""
@@ -140,20 +181,28 @@ def freeze(theme, path, static):
 		path = get_current_dir()
 
 	try:
-		# create app
-		app_ = app.create_app(
+		# create app and freeze
+		freezer.freeze(
 			get_current_dir(),
 			theme_path,
+			jobs=jobs,
+			full=full,
+			prerender_jobs=prerender,
+			compress=compress,
+			compress_jobs=compress_jobs,
+			profile=(os.path.join(get_current_dir(), cache_dir,
+				profile_trace_name) if profile else None),
+			profile_top=profile_top,
 			freeze_path=path,
 			freeze_static=static)
-		app.freeze.freeze()
 
 		if not os.path.exists(os.path.join(path, '.nojekyll')):
 			open(os.path.join(path, '.nojekyll'), 'a').close()
 
 		click.secho('successfully freezed app', fg='green')
 	except ValueError as e:
-		click.secho(e, fg='red')
+		click.secho(str(e), fg='red')
+		sys.exit(1)
 
 
 @cli.command()
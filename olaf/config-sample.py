@@ -64,6 +64,42 @@ SITE = {
 
 	# Set syntax highlighting style (pygments styles)
 	# Try "olaf utils -p" to get list of inbuilt styles
-	'pygments_style': ''
+	'pygments_style': '',
+
+	# Maximum size of rendered contents cache in megabytes, defaults to 100
+	# cache is stored in ".olaf-cache" folder of site directory, 0 disables it
+	'render_cache_size': 100,
+
+	# Maximum size of highlighted code blocks cache in megabytes, defaults to 20
+	# cache is stored in ".olaf-cache" folder of site directory, 0 disables it
+	'highlight_cache_size': 20,
+
+	# Maximum size of tokenized posts cache used by search index in megabytes,
+	# defaults to 20, cache is stored in ".olaf-cache" folder of site directory
+	'search_cache_size': 20,
+
+	# Maximum number of results returned by "/search?q=" view, defaults to 20
+	'search_limit': 20,
+
+	# Number of related posts listed below each post, found by shared
+	# tags and words, defaults to 5, 0 disables it
+	'related_posts': 5,
+
+	# Maximum size of in-memory cache of rendered pages used by "olaf run"
+	# in megabytes, defaults to 50, 0 disables it
+	'response_cache_size': 50,
+
+	# Cache-Control max-age in seconds of pages served by "olaf run"
+	# keyed by view name (index, posts, tag_page, recent_feed, ...),
+	# views not listed use 'default', which defaults to 0
+	'max_age': {'default': 0, 'recent_feed': 600},
+
+	# Path of request metrics in prometheus text format served by "olaf run",
+	# defaults to '/_olaf/metrics'
+	'metrics_path': '/_olaf/metrics',
+
+	# Add content hash to urls of theme static and assets files built using
+	# url_for so that browsers can cache them for long, defaults to True
+	'fingerprint_assets': True
 
 }
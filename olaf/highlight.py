@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+	Olaf
+	~~~~~~~~~
+
+	Markdown code highlighting extension which caches highlighted
+	code blocks in memory and on disk, so that code blocks repeated
+	across contents and builds are highlighted only once
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+from collections import OrderedDict
+
+import pygments
+from markdown.extensions.codehilite import CodeHilite, \
+	CodeHiliteExtension, HiliteTreeprocessor
+
+from olaf.cache import DiskCache, get_hash
+from olaf.profiler import profiler
+
+# extension names replaced by this extension, see `get_extensions`
+codehilite_names = ('codehilite', 'markdown.extensions.codehilite')
+
+
+class HighlightCache(object):
+	"""
+	Cache of highlighted html with in-memory least recently used entries
+	and an optional on-disk tier shared by processes
+	"""
+
+	def __init__(self, max_entries=1000):
+		self.max_entries = max_entries
+		self.disk_cache = DiskCache()
+		self._entries = OrderedDict()
+		self.init(None, 0)
+
+	def init(self, path, max_size):
+		"""
+		set on-disk cache directory and maximum size in bytes,
+		on-disk cache is disabled if path or max_size is not set
+		"""
+		self.disk_cache.init(path, max_size)
+		self.hits = 0
+		self.misses = 0
+		self._entries.clear()
+
+	def get(self, key):
+		"""
+		get cached html or None if not found
+		"""
+		html = self._entries.pop(key, None)
+		if html is None:
+			html = self.disk_cache.get(key)
+
+		if html is None:
+			self.misses += 1
+			return None
+
+		self._entries[key] = html  # most recently used
+		self.hits += 1
+		return html
+
+	def set(self, key, html):
+		self._entries[key] = html
+		if len(self._entries) > self.max_entries:
+			self._entries.popitem(last=False)
+		self.disk_cache.set(key, html)
+
+
+highlight_cache = HighlightCache()
+
+
+class CachedCodeHilite(CodeHilite):
+	"""
+	CodeHilite which looks up highlighted html by lexer name,
+	formatter options and code before highlighting
+	"""
+
+	def hilite(self):
+		# parse language header upfront to get lexer name,
+		# see CodeHilite.hilite
+		self.src = self.src.strip('\n')
+		if self.lang is None:
+			self._parseHeader()
+
+		key = get_hash(repr((self.lang, self.linenums, self.guess_lang,
+			self.css_class, self.style, self.noclasses, self.hl_lines,
+			self.use_pygments, pygments.__version__)), self.src)
+
+		html = highlight_cache.get(key)
+		if html is None:
+			with profiler.phase('highlight'):
+				html = super(CachedCodeHilite, self).hilite()
+			highlight_cache.set(key, html)
+		return html
+
+
+class CachedHiliteTreeprocessor(HiliteTreeprocessor):
+	"""
+	HiliteTreeprocessor using CachedCodeHilite
+	"""
+
+	def run(self, root):
+		for block in root.iter('pre'):
+			if len(block) == 1 and block[0].tag == 'code':
+				code = CachedCodeHilite(
+					block[0].text,
+					linenums=self.config['linenums'],
+					guess_lang=self.config['guess_lang'],
+					css_class=self.config['css_class'],
+					style=self.config['pygments_style'],
+					noclasses=self.config['noclasses'],
+					tab_length=self.markdown.tab_length,
+					use_pygments=self.config['use_pygments'])
+				placeholder = self.markdown.htmlStash.store(
+					code.hilite(), safe=True)
+
+				# replace code block with placeholder paragraph,
+				# see HiliteTreeprocessor.run
+				block.clear()
+				block.tag = 'p'
+				block.text = placeholder
+
+
+class HighlightExtension(CodeHiliteExtension):
+	"""
+	codehilite extension with cached highlighting, takes same options
+	"""
+
+	def extendMarkdown(self, md, md_globals):
+		hiliter = CachedHiliteTreeprocessor(md)
+		hiliter.config = self.getConfigs()
+		md.treeprocessors.add('hilite', hiliter, '<inline')
+		md.registerExtension(self)
+
+
+def makeExtension(*args, **kwargs):
+	return HighlightExtension(*args, **kwargs)
+
+
+def get_extensions(extensions):
+	"""
+	replace codehilite in list of markdown extensions with this extension
+	"""
+	return ['olaf.highlight' if extension in codehilite_names else extension
+		for extension in extensions]
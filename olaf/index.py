@@ -0,0 +1,538 @@
+# -*- coding: utf-8 -*-
+"""
+	Olaf
+	~~~~~~~~~
+
+	In-memory content index built once per app and patched on changes
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import bisect
+import datetime
+
+from olaf import posts_dir, pages_dir
+from olaf.utils import markdown_to_text, truncate_words
+
+# reading speed used to estimate reading time of contents
+words_per_minute = 200
+
+
+def get_slug(path):
+	"""
+	get content slug from its path,
+	returns None if content is neither a post nor a page
+	"""
+	for content_dir in (posts_dir, pages_dir):
+		prefix = content_dir + '/'
+		if path.startswith(prefix):
+			return path[len(prefix):]
+	return None
+
+
+def is_valid_post(page):
+	"""
+	check if page is a post with date and title
+	"""
+	return bool(page.path.startswith(posts_dir + '/') and
+		page.meta.get('date') and
+		page.meta.get('title'))
+
+
+def get_tags(page):
+	"""
+	get set of tags of a page as unicode strings,
+	YAML parses tags like 2015 as numbers
+	"""
+	tags = page.meta.get('tags') or []
+	if isinstance(tags, basestring):
+		tags = [tags]
+	return set(tag if isinstance(tag, unicode) else unicode(tag)
+		for tag in tags if tag is not None)
+
+
+def get_dependency_keys(page):
+	"""
+	get keys of index lookups whose results change when given page changes,
+	pages rendered using these lookups depend on the page
+	"""
+	keys = ['content:' + page.path]
+
+	if is_valid_post(page):
+		date = page.meta['date']
+		keys.append('posts')
+		keys.append('archive:{}'.format(date.year))
+		keys.append('archive:{}/{}'.format(date.year, date.month))
+		keys.extend('tag:' + tag for tag in sorted(get_tags(page)))
+	elif page.path.startswith(pages_dir + '/'):
+		keys.append('pages')
+
+	return keys
+
+
+def to_datetime(date):
+	"""
+	convert date to datetime object so that
+	date and datetime values can be compared
+	"""
+	if not isinstance(date, datetime.datetime):
+		date = datetime.datetime.combine(date, datetime.time.min)
+	return date
+
+
+def post_sort_key(page):
+	"""
+	sort key for posts
+	"""
+	return (to_datetime(page.meta['date']), page.path)
+
+
+def get_modified_date(page):
+	"""
+	get latest of date and updated meta data of a page,
+	None if page has neither
+	"""
+	dates = [to_datetime(page.meta[key]) for key in ('date', 'updated')
+		if page.meta.get(key)]
+	return max(dates) if dates else None
+
+
+def get_date_range(year, month=None):
+	"""
+	get (start, end) datetime range for a year or a month of a year,
+	raises ValueError for out of range values
+	"""
+	if month:
+		start = datetime.datetime(year, month, 1)
+		if month == 12:
+			end = datetime.datetime(year + 1, 1, 1)
+		else:
+			end = datetime.datetime(year, month + 1, 1)
+	else:
+		start = datetime.datetime(year, 1, 1)
+		end = datetime.datetime(year + 1, 1, 1)
+	return (start, end)
+
+
+class ContentInfo(object):
+	"""
+	Compact record of plain text summary, word count and reading time of
+	a content. Computed on first access and kept along with the page object,
+	which is replaced whenever content file is modified, so listing pages
+	do not touch content body again.
+	"""
+
+	__slots__ = ('_page', '_summary_length', '_summary', '_word_count')
+
+	def __init__(self, page, summary_length):
+		self._page = page
+		self._summary_length = summary_length
+
+	def _load(self):
+		"""
+		compute record from content body, lazily loaded bodies
+		are read without being kept in memory
+		"""
+		read_body = getattr(self._page, 'read_body', None)
+		body = read_body() if read_body else self._page.body
+		text = markdown_to_text(body)
+
+		self._summary = truncate_words(text, self._summary_length)
+		self._word_count = len(text.split())
+		self._page = None
+
+	@property
+	def summary(self):
+		if self._page is not None:
+			self._load()
+		return self._summary
+
+	@property
+	def word_count(self):
+		if self._page is not None:
+			self._load()
+		return self._word_count
+
+	@property
+	def reading_time(self):
+		"""
+		estimated reading time in minutes
+		"""
+		return max(int(round(float(self.word_count) / words_per_minute)), 1)
+
+
+class SortedPosts(object):
+	"""
+	List of posts kept sorted by date (oldest first)
+	"""
+
+	def __init__(self):
+		self._keys = []
+		self._posts = []
+
+	def __iter__(self):
+		return iter(self._posts)
+
+	def __reversed__(self):
+		return reversed(self._posts)
+
+	def __len__(self):
+		return len(self._posts)
+
+	def __getitem__(self, index):
+		return self._posts[index]
+
+	def add(self, post):
+		"""
+		insert post at its sorted position
+		"""
+		key = post_sort_key(post)
+
+		# posts are mostly added in order while building, so append directly
+		if not self._keys or key >= self._keys[-1]:
+			self._keys.append(key)
+			self._posts.append(post)
+			return
+
+		position = bisect.bisect_right(self._keys, key)
+		self._keys.insert(position, key)
+		self._posts.insert(position, post)
+
+	def date_range(self, start, end):
+		"""
+		get (low, high) positions of posts dated between
+		start (inclusive) and end (exclusive)
+		"""
+		low = bisect.bisect_left(self._keys, (start, ))
+		high = bisect.bisect_left(self._keys, (end, ))
+		return (low, high)
+
+	def remove(self, post):
+		"""
+		remove post from list, does nothing if post not found
+		"""
+		key = post_sort_key(post)
+		position = bisect.bisect_left(self._keys, key)
+		if position < len(self._keys) and self._keys[position] == key:
+			del self._keys[position]
+			del self._posts[position]
+
+
+class PostCursor(object):
+	"""
+	Lazy window over a range of sorted posts, posts are only
+	fetched while iterating so no intermediate lists are built
+	"""
+
+	def __init__(self, posts, low=0, high=None, reverse=False):
+		self._posts = posts
+		self.low = low
+		self.high = len(posts) if high is None else high
+		self.reverse = reverse
+
+	def __len__(self):
+		return max(self.high - self.low, 0)
+
+	def __nonzero__(self):
+		return self.high > self.low
+
+	def __iter__(self):
+		posts = self._posts
+		if self.reverse:
+			positions = xrange(self.high - 1, self.low - 1, -1)
+		else:
+			positions = xrange(self.low, self.high)
+
+		for position in positions:
+			yield posts[position]
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return list(self)[index]
+
+		if index < 0:
+			index += len(self)
+		if not 0 <= index < len(self):
+			raise IndexError('cursor index out of range')
+
+		if self.reverse:
+			return self._posts[self.high - 1 - index]
+		return self._posts[self.low + index]
+
+	def window(self, offset=0, limit=None):
+		"""
+		get a narrower cursor skipping offset posts and
+		containing at most limit posts
+		"""
+		offset = max(offset, 0)
+		size = max(len(self) - offset, 0)
+		if limit is not None:
+			size = min(size, max(limit, 0))
+
+		if self.reverse:
+			high = self.high - offset
+			return PostCursor(self._posts, high - size, high, True)
+
+		low = self.low + offset
+		return PostCursor(self._posts, low, low + size, False)
+
+	def page(self, page_no, limit):
+		"""
+		get cursor for given page number (starts from 1)
+		"""
+		if page_no < 1:
+			return self.window(len(self))
+		return self.window((page_no - 1) * limit, limit)
+
+
+class ContentIndex(object):
+	"""
+	Index of posts and pages keyed by path and slug
+	"""
+
+	def __init__(self, summary_length=180):
+		# set of lookup keys used while tracking is enabled, see `track`
+		self.tracked = None
+		self.summary_length = summary_length
+		self.clear()
+
+	def clear(self):
+		"""
+		forget all indexed contents
+		"""
+		self._paths = {}  # path -> page
+		self._slugs = {}  # slug -> page
+		self.duplicates = {}  # slug -> list of paths sharing the slug
+		self.posts = SortedPosts()  # valid posts sorted by date
+		self.tags = {}  # tag -> SortedPosts
+		self.archive = {}  # year -> {month: number of posts}
+		self.generation = 0  # incremented whenever contents change
+		self._modified = {}  # lookup key -> last modified date
+
+	def __iter__(self):
+		"""
+		iterate over all indexed posts and pages
+		"""
+		self.track('posts', 'pages')
+		return self._paths.itervalues()
+
+	def __len__(self):
+		return len(self._paths)
+
+	def track(self, *keys):
+		"""
+		record lookup keys if tracking is enabled by setting
+		`tracked` to a set, used to find pages affected by content changes
+		"""
+		if self.tracked is not None:
+			self.tracked.update(keys)
+
+	def get(self, slug, default=None):
+		"""
+		get post or page by slug
+		"""
+		page = self._slugs.get(slug)
+		if page is None:
+			return default
+
+		self.track('content:' + page.path)
+		return page
+
+	def pages(self):
+		"""
+		list of all pages
+		"""
+		self.track('pages')
+		return [page for page in self._paths.itervalues()
+			if page.path.startswith(pages_dir + '/')]
+
+	def build(self, pages):
+		"""
+		build index from scratch, raises ValueError on duplicate slugs
+		"""
+		self.clear()
+
+		# add posts in date order so sorted lists are only appended to
+		pages = sorted(pages, key=lambda page: (
+			post_sort_key(page) if is_valid_post(page) else ()))
+
+		for page in pages:
+			self.add(page)
+
+		if self.duplicates:
+			raise ValueError('Duplicate slug : {}'.format(
+				', '.join(sorted(self.duplicates))))
+
+		self.generation += 1
+
+	def update(self, path, page=None):
+		"""
+		patch index with a single modified page, page is removed
+		from index if not given. Returns set of dependency keys of
+		previous and new page, which is empty if page is unchanged.
+		"""
+		previous = self._paths.get(path)
+		if previous is page:
+			return set()
+
+		keys = set()
+		for content in (previous, page):
+			if content is not None:
+				keys.update(get_dependency_keys(content))
+
+		self.remove(path)
+		if page is not None:
+			self.add(page)
+
+		self.generation += 1
+		self._modified.clear()
+		return keys
+
+	def add(self, page):
+		"""
+		add a single page to index
+		"""
+		slug = get_slug(page.path)
+		if slug is None:
+			return
+
+		page.slug = slug
+		page.info = ContentInfo(page, self.summary_length)
+		self._paths[page.path] = page
+
+		existing = self._slugs.get(slug)
+		if existing is None:
+			self._slugs[slug] = page
+		else:
+			# keep first page and record duplicates
+			self.duplicates.setdefault(slug, [existing.path]).append(page.path)
+
+		if is_valid_post(page):
+			self.posts.add(page)
+			for tag in get_tags(page):
+				self.tags.setdefault(tag, SortedPosts()).add(page)
+
+			date = page.meta['date']
+			months = self.archive.setdefault(date.year, {})
+			months[date.month] = months.get(date.month, 0) + 1
+
+	def remove(self, path):
+		"""
+		remove a single page from index by path
+		"""
+		page = self._paths.pop(path, None)
+		if page is None:
+			return
+
+		paths = self.duplicates.get(page.slug)
+		if paths:
+			paths.remove(path)
+			if self._slugs.get(page.slug) is page:
+				self._slugs[page.slug] = self._paths[paths[0]]
+			if len(paths) < 2:
+				del self.duplicates[page.slug]
+		else:
+			self._slugs.pop(page.slug, None)
+
+		if is_valid_post(page):
+			self.posts.remove(page)
+			for tag in get_tags(page):
+				tag_posts = self.tags.get(tag)
+				if tag_posts is None:
+					continue
+				tag_posts.remove(page)
+				if not tag_posts:
+					del self.tags[tag]
+
+			date = page.meta['date']
+			months = self.archive[date.year]
+			months[date.month] -= 1
+			if not months[date.month]:
+				del months[date.month]
+			if not months:
+				del self.archive[date.year]
+
+	def tag_counts(self):
+		"""
+		list of (tag, number of posts) sorted by tag name
+		"""
+		self.track('posts')
+		return sorted(
+			(tag, len(posts)) for tag, posts in self.tags.iteritems())
+
+	def archive_counts(self):
+		"""
+		list of (year, number of posts, [(month, number of posts), ...])
+		sorted by latest year and month first
+		"""
+		self.track('posts')
+		return [(year, sum(months.itervalues()),
+				sorted(months.iteritems(), reverse=True))
+			for year, months in sorted(self.archive.iteritems(), reverse=True)]
+
+	def get_key_contents(self, key):
+		"""
+		get contents whose changes affect results of given lookup key
+		"""
+		kind, _, value = key.partition(':')
+		if kind == 'posts':
+			return self.posts
+		elif kind == 'pages':
+			return [page for page in self._paths.itervalues()
+				if page.path.startswith(pages_dir + '/')]
+		elif kind == 'tag':
+			return self.tags.get(value) or []
+		elif kind == 'archive':
+			try:
+				low, high = self.posts.date_range(
+					*get_date_range(*map(int, value.split('/'))))
+			except ValueError:
+				return []
+			return self.posts[low:high]
+		elif kind == 'content' and value in self._paths:
+			return [self._paths[value]]
+		return []
+
+	def last_modified(self, keys):
+		"""
+		get latest date or updated meta data of contents matching
+		given lookup keys, None if there are no dated contents
+		"""
+		dates = []
+		for key in keys:
+			if key not in self._modified:
+				self._modified[key] = max([get_modified_date(page)
+					for page in self.get_key_contents(key)] or [None])
+			if self._modified[key]:
+				dates.append(self._modified[key])
+		return max(dates) if dates else None
+
+	def query(self, tag=None, year=None, month=None, reverse=False):
+		"""
+		get cursor over posts filtered by tag, year and month sorted by date
+		(oldest first unless reverse is set).
+		month is considered only if year is given.
+		"""
+		if tag:
+			posts = self.tags.get(tag) or SortedPosts()
+		else:
+			posts = self.posts
+
+		if not year:
+			self.track('tag:' + tag if tag else 'posts')
+			return PostCursor(posts, reverse=reverse)
+
+		if tag:
+			self.track('tag:' + tag)
+		if month:
+			self.track('archive:{}/{}'.format(year, month))
+		else:
+			self.track('archive:{}'.format(year))
+
+		try:
+			low, high = posts.date_range(*get_date_range(year, month))
+		except ValueError:
+			low, high = 0, 0
+
+		return PostCursor(posts, low, high, reverse=reverse)
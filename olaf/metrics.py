@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+	Olaf
+	~~~~~~~~~
+
+	Request metrics middleware with Prometheus text exposition format
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import bisect
+import threading
+from timeit import default_timer
+
+# upper bounds of request latency histogram buckets in seconds
+latency_buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+	2.5, 5.0, 10.0)
+
+# wsgi environ key of endpoint handling request, see `app.record_endpoint`
+endpoint_key = 'olaf.endpoint'
+
+content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(**labels):
+	"""
+	format labels as {name="value",...} sorted by name
+	"""
+	return u'{{{}}}'.format(u','.join(u'{}="{}"'.format(name, unicode(
+		value).replace(u'\\', u'\\\\').replace(u'"', u'\\"').replace(
+		u'\n', u'\\n')) for name, value in sorted(labels.items())))
+
+
+def format_value(value):
+	return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class RequestMetrics(object):
+	"""
+	Latency histograms, status counts and response sizes of requests
+	by endpoint. Requests are recorded by server threads so updates
+	are made under a lock.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self.clear()
+
+	def clear(self):
+		"""
+		forget all recorded requests
+		"""
+		with self._lock:
+			self._latency = {}  # endpoint -> [bucket counts, sum, count]
+			self._statuses = {}  # (endpoint, status) -> count
+			self._sizes = {}  # endpoint -> [sum, count]
+
+	def observe(self, endpoint, status, duration, size):
+		"""
+		record a finished request
+		"""
+		bucket = bisect.bisect_left(latency_buckets, duration)
+		with self._lock:
+			latency = self._latency.get(endpoint)
+			if latency is None:
+				latency = self._latency[endpoint] = [
+					[0] * (len(latency_buckets) + 1), 0.0, 0]
+			latency[0][bucket] += 1
+			latency[1] += duration
+			latency[2] += 1
+
+			key = (endpoint, status)
+			self._statuses[key] = self._statuses.get(key, 0) + 1
+
+			sizes = self._sizes.setdefault(endpoint, [0, 0])
+			sizes[0] += size
+			sizes[1] += 1
+
+	def render(self, caches=()):
+		"""
+		get metrics in Prometheus text exposition format,
+		caches is a list of (cache name, hits, misses)
+		"""
+		with self._lock:
+			latency = dict((endpoint, (list(counts), total, count))
+				for endpoint, (counts, total, count) in self._latency.items())
+			statuses = dict(self._statuses)
+			sizes = dict((endpoint, tuple(value))
+				for endpoint, value in self._sizes.items())
+
+		lines = [
+			u'# HELP olaf_request_duration_seconds Request latency by endpoint.',
+			u'# TYPE olaf_request_duration_seconds histogram']
+		for endpoint, (counts, total, count) in sorted(latency.items()):
+			cumulative = 0
+			for bound, bucket_count in zip(
+				[format_value(bound) for bound in latency_buckets] + ['+Inf'],
+				counts):
+				cumulative += bucket_count
+				lines.append(u'olaf_request_duration_seconds_bucket{} {}'.format(
+					format_labels(endpoint=endpoint, le=bound), cumulative))
+			labels = format_labels(endpoint=endpoint)
+			lines.append(u'olaf_request_duration_seconds_sum{} {}'.format(
+				labels, format_value(total)))
+			lines.append(u'olaf_request_duration_seconds_count{} {}'.format(
+				labels, count))
+
+		lines.extend([
+			u'# HELP olaf_requests_total Requests by endpoint and status code.',
+			u'# TYPE olaf_requests_total counter'])
+		for (endpoint, status), count in sorted(statuses.items()):
+			lines.append(u'olaf_requests_total{} {}'.format(
+				format_labels(endpoint=endpoint, status=status), count))
+
+		lines.extend([
+			u'# HELP olaf_response_size_bytes Response body size by endpoint.',
+			u'# TYPE olaf_response_size_bytes summary'])
+		for endpoint, (total, count) in sorted(sizes.items()):
+			labels = format_labels(endpoint=endpoint)
+			lines.append(u'olaf_response_size_bytes_sum{} {}'.format(
+				labels, total))
+			lines.append(u'olaf_response_size_bytes_count{} {}'.format(
+				labels, count))
+
+		for name, kind, position in (('hits', 'Cache hits', 1),
+			('misses', 'Cache misses', 2)):
+			lines.extend([
+				u'# HELP olaf_cache_{}_total {} by cache.'.format(name, kind),
+				u'# TYPE olaf_cache_{}_total counter'.format(name)])
+			for cache in caches:
+				lines.append(u'olaf_cache_{}_total{} {}'.format(
+					name, format_labels(cache=cache[0]), cache[position]))
+
+		return u'\n'.join(lines) + u'\n'
+
+
+class MeteredIterable(object):
+	"""
+	Response iterable counting bytes sent, calls callback
+	with size once response is closed
+	"""
+
+	def __init__(self, iterable, callback):
+		self.iterable = iterable
+		self.callback = callback
+		self.size = 0
+
+	def __iter__(self):
+		for chunk in self.iterable:
+			self.size += len(chunk)
+			yield chunk
+
+	def close(self):
+		try:
+			if hasattr(self.iterable, 'close'):
+				self.iterable.close()
+		finally:
+			self.callback(self.size)
+
+
+class MetricsMiddleware(object):
+	"""
+	WSGI middleware recording latency, status code and size of responses,
+	latency includes time taken to send streamed responses
+	"""
+
+	def __init__(self, wsgi_app, metrics):
+		self.wsgi_app = wsgi_app
+		self.metrics = metrics
+
+	def __call__(self, environ, start_response):
+		start = default_timer()
+		status = []
+
+		def metered_start_response(status_line, headers, exc_info=None):
+			status[:] = [status_line.split(None, 1)[0]]
+			return start_response(status_line, headers, exc_info)
+
+		def finish(size):
+			self.metrics.observe(environ.get(endpoint_key) or 'unmatched',
+				status[0] if status else '500', default_timer() - start, size)
+
+		try:
+			iterable = self.wsgi_app(environ, metered_start_response)
+		except:
+			finish(0)
+			raise
+
+		return MeteredIterable(iterable, finish)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+	Olaf
+	~~~~~~~~~
+
+	FlatPages which scan only meta data of contents and
+	load content body lazily
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+
+from werkzeug.utils import cached_property, import_string
+from flask_flatpages import FlatPages, Page
+
+from olaf.profiler import profiler
+
+
+def scan_file(filename, encoding='utf-8'):
+	"""
+	read meta data block of a content file, that is lines till the first
+	blank line. Returns meta data and offset at which content body starts.
+	"""
+	lines = []
+	with open(filename, 'rb') as f:
+		for line in iter(f.readline, b''):
+			line = line.decode(encoding)
+			if not line.strip():
+				break
+			lines.append(line.rstrip('\n'))
+		offset = f.tell()
+
+	return (u'\n'.join(lines), offset)
+
+
+class LazyPage(Page):
+	"""
+	Page whose body is read from file only when it is accessed
+	"""
+
+	def __init__(self, path, meta, filename, offset, encoding, html_renderer):
+		# Page.__init__ is not called since it sets body
+		self.path = path
+		self._meta = meta
+		self.filename = filename
+		self.offset = offset
+		self.encoding = encoding
+		self.html_renderer = html_renderer
+
+	@cached_property
+	def body(self):
+		"""
+		content body read from file
+		"""
+		return self.read_body()
+
+	def read_body(self):
+		"""
+		read content body from file without keeping it in memory
+		"""
+		with profiler.phase('load'):
+			with open(self.filename, 'rb') as f:
+				f.seek(self.offset)
+				return f.read().decode(self.encoding)
+
+
+class LazyFlatPages(FlatPages):
+	"""
+	FlatPages which read only meta data of files while loading pages
+	"""
+
+	def _load_file(self, path, filename):
+		"""
+		load page from file if modified since it was last loaded
+		"""
+		mtime = os.path.getmtime(filename)
+		cached = self._file_cache.get(filename)
+		if cached and cached[1] == mtime:
+			return cached[0]
+
+		encoding = self.config('encoding')
+		meta, offset = scan_file(filename, encoding)
+
+		html_renderer = self.config('html_renderer')
+		if not callable(html_renderer):
+			html_renderer = import_string(html_renderer)
+
+		page = LazyPage(path, meta, filename, offset, encoding,
+			self._smart_html_renderer(html_renderer))
+
+		self._file_cache[filename] = (page, mtime)
+		return page
+
+	def reload_file(self, filename):
+		"""
+		reload a single content file, returns (path, page) where
+		page is None if file was removed or is not a content file
+		"""
+		extension = self.config('extension')
+		path = os.path.relpath(filename, self.root)
+		if path.startswith(os.pardir + os.sep) or not path.endswith(extension):
+			return (None, None)
+
+		path = u'/'.join(path[:-len(extension)].split(os.sep))
+		pages = self._pages
+
+		if os.path.isfile(filename):
+			pages[path] = self._load_file(path, filename)
+		else:
+			pages.pop(path, None)
+			self._file_cache.pop(filename, None)
+
+		return (path, pages.get(path))
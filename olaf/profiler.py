@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+	Olaf
+	~~~~~~~~~
+
+	Build profiler recording time spent in each phase of building
+	a url, phases are timed only while profiling is enabled
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+from timeit import default_timer
+
+from flask.testing import FlaskClient
+from jinja2 import Template
+
+# time spent in url and request phases but not in any nested phase
+# is reported as writing output and running views
+phase_labels = {'url': 'write', 'request': 'view'}
+
+# phases in report order
+report_phases = ('load', 'markdown', 'highlight', 'template', 'view', 'write')
+
+
+class NullPhase(object):
+	"""
+	Phase used while profiling is disabled, does nothing
+	"""
+
+	def __enter__(self):
+		pass
+
+	def __exit__(self, *exc_info):
+		pass
+
+null_phase = NullPhase()
+
+
+class Phase(object):
+	"""
+	Timed phase, time spent in nested phases is excluded
+	from time reported for the phase
+	"""
+
+	__slots__ = ('profiler', 'name', 'label', 'start', 'nested')
+
+	def __init__(self, profiler, name, label=None):
+		self.profiler = profiler
+		self.name = name
+		self.label = label or name
+
+	def __enter__(self):
+		if self.name == 'url':
+			self.profiler._phases = {}
+		self.nested = 0.0
+		self.profiler._stack.append(self)
+		self.start = default_timer()
+
+	def __exit__(self, *exc_info):
+		duration = default_timer() - self.start
+		self.profiler.record(self, duration)
+
+
+class BuildProfiler(object):
+	"""
+	Records time of each url built and its phases as (url, total seconds,
+	{phase: seconds}) records and as trace events
+	"""
+
+	def __init__(self):
+		self.enabled = False
+		self.clear()
+
+	def clear(self):
+		"""
+		forget recorded urls and events
+		"""
+		self.records = []
+		self.events = []
+		self._stack = []
+		self._phases = None  # phase times of url being built
+
+	def url(self, url):
+		"""
+		get context timing build of a url
+		"""
+		if not self.enabled:
+			return null_phase
+		return Phase(self, 'url', url)
+
+	def phase(self, name):
+		"""
+		get context timing a phase of url being built
+		"""
+		if self._phases is None:
+			return null_phase
+		return Phase(self, name)
+
+	def record(self, phase, duration):
+		"""
+		record a finished phase
+		"""
+		stack = self._stack
+		stack.pop()
+		if stack:
+			stack[-1].nested += duration
+
+		name = phase_labels.get(phase.name, phase.name)
+		phases = self._phases
+		phases[name] = phases.get(name, 0.0) + duration - phase.nested
+
+		self.events.append({
+			'name': phase.label,
+			'cat': phase.name,
+			'ph': 'X',
+			'ts': phase.start * 1e6,
+			'dur': duration * 1e6,
+			'pid': os.getpid(),
+			'tid': 0
+		})
+
+		if phase.name == 'url':
+			self.records.append((phase.label, duration, phases))
+			self._phases = None
+
+	def pop(self):
+		"""
+		get and forget (records, events) recorded so far
+		"""
+		records, events = self.records, self.events
+		self.clear()
+		return (records, events)
+
+
+class ProfiledTemplate(Template):
+	"""
+	Jinja template timing its rendering
+	"""
+
+	def render(self, *args, **kwargs):
+		with profiler.phase('template'):
+			return Template.render(self, *args, **kwargs)
+
+
+class ProfiledClient(FlaskClient):
+	"""
+	Test client timing requests made by freezer
+	"""
+
+	def open(self, *args, **kwargs):
+		with profiler.phase('request'):
+			return FlaskClient.open(self, *args, **kwargs)
+
+
+def get_report(records, top=20):
+	"""
+	get lines of report of slowest urls and total time of each phase
+	"""
+	totals = dict((phase, 0.0) for phase in report_phases)
+	for url, total, phases in records:
+		for phase, seconds in phases.iteritems():
+			totals[phase] = totals.get(phase, 0.0) + seconds
+
+	header = u''.join(u'{:>10}'.format(phase) for phase in report_phases)
+	lines = [u'{:>10}{}  url'.format(u'total', header)]
+
+	def format_line(total, phases, name):
+		return u'{:>10.1f}{}  {}'.format(total * 1000, u''.join(
+			u'{:>10.1f}'.format(phases.get(phase, 0.0) * 1000)
+			for phase in report_phases), name)
+
+	slowest = sorted(records, key=lambda record: record[1], reverse=True)
+	for url, total, phases in slowest[:top]:
+		lines.append(format_line(total, phases, url))
+
+	lines.append(format_line(sum(record[1] for record in records), totals,
+		u'all {} urls (milliseconds)'.format(len(records))))
+	return lines
+
+
+def get_trace(events):
+	"""
+	get chrome trace event format data of recorded events,
+	timestamps are relative to first event
+	"""
+	origin = min(event['ts'] for event in events) if events else 0
+	trace = []
+	for event in sorted(events, key=lambda event: event['ts']):
+		event = dict(event, ts=round(event['ts'] - origin, 1),
+			dur=round(event['dur'], 1))
+		trace.append(event)
+	return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+
+profiler = BuildProfiler()
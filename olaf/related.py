@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+	Olaf
+	~~~~~~~~~
+
+	Related posts of all posts computed in a single pass over
+	tag and search term posting lists
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import math
+import heapq
+
+# number of highest weighted terms of a post used to find related posts
+max_terms = 15
+
+# terms found in more than this fraction of posts relate almost
+# every post, they are skipped so candidates are not all posts
+max_post_ratio = 0.1
+min_post_limit = 50  # posting lists below this size are never skipped
+
+# candidates of a post are only highest weighted posts of its terms
+# and posts of its tags dated closest to it
+max_term_candidates = 20
+max_tag_candidates = 20
+
+# score of sharing all tags, term similarity scores at most 1
+tag_weight = 1.0
+
+
+def get_term_vectors(index, post_limit):
+	"""
+	get {path: {term: weight}} of top tf-idf weighted terms of indexed
+	posts normalized to unit length, terms of a single post are skipped
+	"""
+	total = len(index.docs)
+	idf = {}
+	for term, postings in index.postings.iteritems():
+		if 1 < len(postings) <= post_limit:
+			idf[term] = math.log(float(total) / len(postings))
+
+	vectors = {}
+	for path, (content_hash, length, terms) in index.docs.iteritems():
+		weights = heapq.nlargest(max_terms,
+			((index.postings[term][path] * idf[term], term)
+				for term in terms if term in idf))
+		norm = math.sqrt(sum(weight * weight for weight, term in weights))
+		vectors[path] = dict((term, weight / norm)
+			for weight, term in weights if weight)
+	return vectors
+
+
+def get_related(index, tags, limit=5):
+	"""
+	get {path: [related paths]} of all posts in search index, best match
+	first. Posts are scored by cosine similarity of their tag sets and
+	term vectors. Candidates are only posts sharing a tag or a term,
+	see `max_term_candidates` and `max_tag_candidates`.
+
+	`tags` is {tag: posts} of content index.
+	"""
+	total = len(index.docs)
+	post_limit = max(int(total * max_post_ratio), min_post_limit)
+
+	vectors = get_term_vectors(index, post_limit)
+	term_postings = {}
+	for path, vector in vectors.iteritems():
+		for term, weight in vector.iteritems():
+			term_postings.setdefault(term, []).append((path, weight))
+	for term, postings in term_postings.iteritems():
+		if len(postings) > max_term_candidates:
+			term_postings[term] = heapq.nlargest(max_term_candidates, postings,
+				key=lambda posting: (posting[1], posting[0]))
+
+	# tag posts are sorted by date, post_tags is {path: [(tag, position)]}
+	tag_postings = {}
+	post_tags = {}
+	for tag, posts in tags.iteritems():
+		paths = [post.path for post in posts if post.path in index.docs]
+		tag_postings[tag] = paths
+		for position, path in enumerate(paths):
+			post_tags.setdefault(path, []).append((tag, position))
+
+	related = {}
+	for path in index.docs:
+		scores = {}
+		for term, weight in vectors[path].iteritems():
+			for other, other_weight in term_postings[term]:
+				scores[other] = scores.get(other, 0) + weight * other_weight
+
+		post_tag_count = len(post_tags.get(path, ()))
+		for tag, position in post_tags.get(path, ()):
+			low = max(position - max_tag_candidates // 2, 0)
+			for other in tag_postings[tag][low:low + max_tag_candidates + 1]:
+				scores[other] = scores.get(other, 0) + tag_weight / math.sqrt(
+					post_tag_count * len(post_tags[other]))
+
+		scores.pop(path, None)
+		related[path] = [other for other, score in heapq.nsmallest(
+			limit, scores.iteritems(), key=lambda item: (-item[1], item[0]))]
+
+	return related
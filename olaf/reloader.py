@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+	Olaf
+	~~~~~~~~~
+
+	Content watchers which record modified content files in background
+	so that requests only re-parse changed files instead of scanning
+	whole contents directory
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import time
+import threading
+
+import click
+
+try:
+	import pyinotify
+except ImportError:
+	pyinotify = None
+
+reload_modes = ('off', 'poll', 'watch')
+
+
+class ContentWatcher(object):
+	"""
+	Base watcher, collects paths of modified files under root directory.
+	Changes are only recorded by watcher threads and applied by
+	whoever calls `pop_changes`, so indexes are never patched concurrently.
+	"""
+
+	def __init__(self, root):
+		self.root = root
+		self._changes = set()
+		self._lock = threading.Lock()
+
+	def add_change(self, filename):
+		with self._lock:
+			self._changes.add(filename)
+
+	def pop_changes(self):
+		"""
+		get set of files modified since last call
+		"""
+		with self._lock:
+			changes, self._changes = self._changes, set()
+		return changes
+
+	def start(self):
+		pass
+
+
+class PollingWatcher(ContentWatcher):
+	"""
+	Watcher thread which compares modification times of files
+	under root directory every `interval` seconds
+	"""
+
+	def __init__(self, root, interval=1):
+		super(PollingWatcher, self).__init__(root)
+		self.interval = interval
+		self._mtimes = self.scan()
+
+	def scan(self):
+		"""
+		get {filename: modification time} of all files under root
+		"""
+		mtimes = {}
+		for current_path, dirs, files in os.walk(self.root):
+			for name in files:
+				filename = os.path.join(current_path, name)
+				try:
+					mtimes[filename] = os.path.getmtime(filename)
+				except OSError:
+					continue
+		return mtimes
+
+	def check(self):
+		"""
+		record files added, modified or removed since last check
+		"""
+		mtimes = self.scan()
+		for filename in set(mtimes) | set(self._mtimes):
+			if mtimes.get(filename) != self._mtimes.get(filename):
+				self.add_change(filename)
+		self._mtimes = mtimes
+
+	def run(self):
+		while True:
+			time.sleep(self.interval)
+			self.check()
+
+	def start(self):
+		thread = threading.Thread(target=self.run, name='olaf-poll-watcher')
+		thread.daemon = True
+		thread.start()
+
+
+class InotifyWatcher(ContentWatcher):
+	"""
+	Watcher using inotify events, requires pyinotify
+	"""
+
+	def start(self):
+		watcher = self
+
+		class EventHandler(pyinotify.ProcessEvent):
+			def process_default(self, event):
+				if not event.dir:
+					watcher.add_change(event.pathname)
+
+		mask = (pyinotify.IN_CLOSE_WRITE | pyinotify.IN_CREATE |
+			pyinotify.IN_DELETE | pyinotify.IN_MOVED_FROM |
+			pyinotify.IN_MOVED_TO)
+
+		watch_manager = pyinotify.WatchManager()
+		watch_manager.add_watch(self.root, mask, rec=True, auto_add=True)
+
+		notifier = pyinotify.ThreadedNotifier(watch_manager, EventHandler())
+		notifier.daemon = True
+		notifier.start()
+
+
+def get_watcher(root, mode, interval=1):
+	"""
+	get started watcher for given reload mode, watch mode falls back
+	to polling with a notice if inotify is not available.
+	Returns None if mode is off.
+	"""
+	if mode not in reload_modes:
+		raise ValueError('Invalid reload mode : {}'.format(mode))
+
+	if mode == 'off':
+		return None
+
+	if mode == 'watch':
+		if pyinotify is None:
+			click.secho('pyinotify is not installed, polling contents for '
+				'changes (pip install getolaf[watch])', fg='yellow', err=True)
+		else:
+			watcher = InotifyWatcher(root)
+			try:
+				watcher.start()
+				return watcher
+			except (OSError, pyinotify.PyinotifyError):
+				# inotify limits reached
+				click.secho('inotify is not available, polling contents '
+					'for changes', fg='yellow', err=True)
+
+	watcher = PollingWatcher(root, interval)
+	watcher.start()
+	return watcher
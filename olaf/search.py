@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+	Olaf
+	~~~~~~~~~
+
+	Full-text search index of posts with BM25 ranking,
+	patched incrementally and exported as prefix sharded postings
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import re
+import json
+import math
+import heapq
+
+from olaf.cache import get_hash
+from olaf.index import get_tags
+from olaf.utils import markdown_to_text
+
+# bumped whenever tokenizer or weights change so cached documents are redone
+index_version = 1
+
+token_re = re.compile(r'\w+', re.UNICODE)
+
+# term frequencies are weighted by field a term is found in
+field_weights = {'title': 3, 'tags': 2, 'body': 1}
+
+# BM25 term frequency saturation and length normalization parameters
+k1 = 1.2
+b = 0.75
+
+# length of term prefixes by which exported postings are sharded
+prefix_length = 2
+
+
+def tokenize(text):
+	"""
+	get list of lowercase terms of a text, single characters are ignored
+	"""
+	return [term for term in token_re.findall(text.lower()) if len(term) > 1]
+
+
+def get_terms(title, tags, text):
+	"""
+	get ({term: weighted frequency}, document length) of a document
+	"""
+	terms = {}
+	for field, field_text in (('title', title), ('tags', u' '.join(tags)),
+		('body', text)):
+		weight = field_weights[field]
+		for term in tokenize(field_text):
+			terms[term] = terms.get(term, 0) + weight
+	return (terms, sum(terms.itervalues()))
+
+
+class SearchIndex(object):
+	"""
+	Inverted index of post titles, tags and plain text bodies.
+	Tokenized documents are kept in a disk cache keyed by content hash
+	so rebuilding the index only tokenizes modified posts.
+	"""
+
+	def __init__(self, cache=None):
+		self.cache = cache  # DiskCache of tokenized documents
+		self.clear()
+
+	def clear(self):
+		"""
+		forget all indexed posts
+		"""
+		self.docs = {}  # path -> (content hash, length, terms)
+		self.postings = {}  # term -> {path: weighted frequency}
+		self.pages = {}  # path -> indexed page object
+		self.total_length = 0
+		self.generation = None  # content index generation, see `app`
+		self.tokenized = 0  # number of documents not found in cache
+		self._export = None  # see `export`
+
+	def __len__(self):
+		return len(self.docs)
+
+	def add(self, path, content_hash, terms, length):
+		"""
+		add a tokenized document to index
+		"""
+		self.remove(path)
+		self.docs[path] = (content_hash, length, tuple(terms))
+		self.total_length += length
+		for term, frequency in terms.iteritems():
+			self.postings.setdefault(term, {})[path] = frequency
+		self._export = None
+
+	def remove(self, path):
+		"""
+		remove a document from index, does nothing if path not found
+		"""
+		doc = self.docs.pop(path, None)
+		if doc is None:
+			return
+
+		content_hash, length, terms = doc
+		self.total_length -= length
+		for term in terms:
+			postings = self.postings[term]
+			del postings[path]
+			if not postings:
+				del self.postings[term]
+		self._export = None
+
+	def index_page(self, page):
+		"""
+		add page to index unless its content hash is unchanged,
+		tokenized document is read from cache if found.
+		Returns True if index changed.
+		"""
+		read_body = getattr(page, 'read_body', None)
+		body = read_body() if read_body else page.body
+		title = unicode(page.meta.get('title') or u'')
+		tags = sorted(get_tags(page))
+
+		content_hash = get_hash(
+			'search', str(index_version), title, u'\0'.join(tags), body)
+		doc = self.docs.get(page.path)
+		if doc and doc[0] == content_hash:
+			return False
+
+		cached = self.cache.get(content_hash) if self.cache else None
+		if cached is not None:
+			terms, length = json.loads(cached)
+		else:
+			terms, length = get_terms(title, tags, markdown_to_text(body))
+			self.tokenized += 1
+			if self.cache:
+				self.cache.set(content_hash, json.dumps([terms, length]))
+
+		self.add(page.path, content_hash, terms, length)
+		return True
+
+	def sync(self, posts):
+		"""
+		patch index with posts added, modified or removed since last sync.
+		Like content index, unmodified posts are found by identity.
+		Returns True if index changed.
+		"""
+		current = {}
+		changed = False
+		for page in posts:
+			current[page.path] = page
+			if self.pages.get(page.path) is page:
+				continue
+
+			# recorded only once indexed so that failed pages are retried
+			if self.index_page(page):
+				changed = True
+			self.pages[page.path] = page
+
+		for path in [path for path in self.pages if path not in current]:
+			del self.pages[path]
+			self.remove(path)
+			changed = True
+
+		return changed
+
+	def search(self, query, limit=None):
+		"""
+		get list of (path, score) of posts matching any term of query
+		ranked by BM25 score, best match first
+		"""
+		total = len(self.docs)
+		if not total:
+			return []
+
+		average_length = float(self.total_length) / total
+		scores = {}
+		for term in set(tokenize(query)):
+			postings = self.postings.get(term)
+			if not postings:
+				continue
+
+			idf = math.log(1 + (total - len(postings) + 0.5) /
+				(len(postings) + 0.5))
+			for path, frequency in postings.iteritems():
+				length = self.docs[path][1]
+				scores[path] = scores.get(path, 0) + idf * (
+					frequency * (k1 + 1) / (frequency + k1 * (
+						1 - b + b * length / average_length)))
+
+		def rank(item):
+			return (-item[1], item[0])
+
+		if limit:
+			return heapq.nsmallest(limit, scores.iteritems(), key=rank)
+		return sorted(scores.iteritems(), key=rank)
+
+	def settings(self):
+		"""
+		get ranking parameters needed to score exported postings
+		"""
+		return {
+			'version': index_version,
+			'k1': k1,
+			'b': b,
+			'prefix_length': prefix_length,
+			'average_length': (float(self.total_length) / len(self.docs)
+				if self.docs else 0)
+		}
+
+	def export(self):
+		"""
+		get (sorted paths, {prefix: {term: [[document number, frequency]]}})
+		where document number is position of path in sorted paths, postings
+		are grouped by term prefix so that clients fetch only shards of
+		terms they search for. Cached till index changes.
+		"""
+		if self._export is None:
+			paths = sorted(self.docs)
+			numbers = dict((path, number) for number, path in enumerate(paths))
+
+			shards = {}
+			for term, postings in self.postings.iteritems():
+				shards.setdefault(term[:prefix_length], {})[term] = sorted(
+					[numbers[path], frequency]
+					for path, frequency in postings.iteritems())
+
+			self._export = (paths, shards)
+
+		return self._export
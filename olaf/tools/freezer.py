@@ -0,0 +1,508 @@
+# -*- coding: utf-8 -*-
+"""
+	Olaf
+	~~~~~~~~~
+
+	Serial, multiprocess and incremental site freezer
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import re
+import gzip
+import json
+import shutil
+import hashlib
+import itertools
+import traceback
+import multiprocessing
+
+import click
+
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+from olaf import app, content_extension
+from olaf.cache import get_file_hash
+from olaf.index import get_dependency_keys
+from olaf.profiler import profiler, get_report, get_trace
+from olaf.utils import create_directory
+
+# build manifest written to freeze destination
+manifest_name = '.olaf-manifest.json'
+manifest_version = 1
+
+# sitemaps written along with gzip compressed copies
+sitemap_url_re = re.compile(r'^/sitemap(-index|-\d+)?\.xml$')
+
+# compressed copies written with --compress, brotli only if available
+compress_formats = ['gz', 'br'] if brotli else ['gz']
+compressed_extensions = ('.html', '.css', '.js', '.xml', '.json', '.svg',
+	'.txt', '.atom')
+
+# app created once per worker process by `init_worker`
+worker_app = None
+
+
+def init_worker(current_path, theme_path, options):
+	"""
+	create app in a worker process
+	"""
+	global worker_app
+	worker_app = app.create_app(current_path, theme_path, **options)
+
+
+def get_logged_urls(freezer):
+	"""
+	get (url, endpoint) of url_for calls made while building pages
+	"""
+	url_generators = freezer.url_generators
+	freezer.url_generators = []
+	try:
+		return list(freezer._generate_all_urls())
+	finally:
+		freezer.url_generators = url_generators
+
+
+def build_urls(urls):
+	"""
+	build given urls, returns (built, errors, logged urls, profile) where
+	built is a list of (url, filename, dependency keys) and profile is
+	(records, events) of build profiler
+	"""
+	freezer = app.freeze
+	content_index = app.content_index
+
+	built = []
+	errors = []
+	for url in urls:
+		# track index lookups made while rendering the url
+		content_index.tracked = set()
+		try:
+			with profiler.url(url):
+				filename = freezer._build_one(url)
+		except Exception:
+			errors.append((url, traceback.format_exc()))
+		else:
+			built.append((url, filename, sorted(content_index.tracked)))
+		finally:
+			content_index.tracked = None
+
+	return (built, errors, get_logged_urls(freezer), profiler.pop())
+
+
+def create_output_directories(freezer, urls):
+	"""
+	create output directories of given urls, workers building urls
+	in parallel would otherwise race to create shared directories
+	"""
+	for url in urls:
+		path = freezer.urlpath_to_filepath(url).split('/')
+		create_directory(os.path.join(freezer.root, *path[:-1]))
+
+
+def split(items, size):
+	"""
+	split list into chunks of given size
+	"""
+	return [items[n:n + size] for n in range(0, len(items), size)]
+
+
+def get_site_hash(current_path, theme_path, options):
+	"""
+	hash of everything every page depends on, that is config, disqus file,
+	theme templates and static files and freeze options
+	"""
+	site_hash = hashlib.sha1()
+	site_hash.update(repr(sorted(
+		(key, value) for key, value in options.items() if key != 'freeze_path')))
+
+	site_files = [os.path.join(current_path, 'config.py'),
+		os.path.join(current_path, 'disqus.html')]
+
+	for root, dirs, files in os.walk(theme_path):
+		dirs.sort()
+		site_files.extend(os.path.join(root, name) for name in sorted(files))
+
+	for path in site_files:
+		if os.path.isfile(path):
+			site_hash.update(os.path.relpath(path, current_path))
+			get_file_hash(path, site_hash)
+
+	return site_hash.hexdigest()
+
+
+def get_contents_manifest(flask_app):
+	"""
+	get {path: {'hash': content hash, 'keys': dependency keys}}
+	of all indexed contents, and assets if urls are fingerprinted
+	"""
+	contents_root = flask_app.config['FLATPAGES_ROOT']
+	contents = {}
+	for page in app.content_index:
+		filename = os.path.join(
+			contents_root, *(page.path + content_extension).split('/'))
+		contents[page.path] = {
+			'hash': get_file_hash(filename).hexdigest(),
+			'keys': get_dependency_keys(page)
+		}
+
+	# pages refer fingerprinted asset urls, see `app.fingerprint_asset_url`
+	if flask_app.config['SITE'].get('fingerprint_assets', True):
+		with flask_app.app_context():
+			assets_path = app.get_assets_path()
+		for filename, fingerprinted in app.asset_manifest.get_manifest(
+			assets_path).iteritems():
+			contents['asset:' + filename] = {
+				'hash': fingerprinted,
+				'keys': ['asset:' + filename]
+			}
+
+	return contents
+
+
+def get_assets_manifest(flask_app):
+	"""
+	get {file name: fingerprinted file name} of static and assets files
+	"""
+	with flask_app.app_context():
+		static_prefix = flask_app.static_url_path.strip('/') + '/'
+		manifest = app.asset_manifest.get_manifest(
+			flask_app.static_folder, static_prefix)
+		manifest.update(app.asset_manifest.get_manifest(
+			app.get_assets_path(), 'assets/'))
+	return manifest
+
+
+def get_related_manifest(flask_app):
+	"""
+	get {path: [related paths]} of all posts, see `app.get_related_lists`
+	"""
+	with flask_app.app_context():
+		return app.get_related_lists()
+
+
+def get_affected_keys(old_contents, new_contents):
+	"""
+	get dependency keys of contents added, modified or removed
+	"""
+	affected = set()
+	for path in set(old_contents) | set(new_contents):
+		old = old_contents.get(path)
+		new = new_contents.get(path)
+		if old and new and old['hash'] == new['hash']:
+			continue
+
+		for content in (old, new):
+			if content:
+				affected.update(content['keys'])
+
+	return affected
+
+
+def load_manifest(root):
+	"""
+	load build manifest from freeze destination,
+	returns None if not found or invalid
+	"""
+	try:
+		with open(os.path.join(root, manifest_name)) as f:
+			manifest = json.load(f)
+	except (IOError, ValueError):
+		return None
+
+	if manifest.get('version') != manifest_version:
+		return None
+
+	return manifest
+
+
+def save_manifest(root, manifest):
+	"""
+	write build manifest to freeze destination
+	"""
+	manifest['version'] = manifest_version
+	with open(os.path.join(root, manifest_name), 'w') as f:
+		json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def compress_file(path, format='gz'):
+	"""
+	write gzip (gz) or brotli (br) compressed copy of a file
+	unless existing copy is newer than the file
+	"""
+	compressed_path = '{}.{}'.format(path, format)
+	if (os.path.isfile(compressed_path) and
+		os.path.getmtime(compressed_path) >= os.path.getmtime(path)):
+		return
+
+	with open(path, 'rb') as f:
+		with open(compressed_path, 'wb') as compressed_file:
+			if format == 'br':
+				compressed_file.write(brotli.compress(f.read()))
+				return
+
+			# fixed mtime so that output is same for same input
+			with gzip.GzipFile(os.path.basename(path), 'wb', 9,
+				compressed_file, mtime=0) as gz:
+				shutil.copyfileobj(f, gz)
+
+
+def compress_output(path):
+	"""
+	write compressed copies of a file in all available formats
+	"""
+	for format in compress_formats:
+		compress_file(path, format)
+
+
+def compress_outputs(paths, jobs=1):
+	"""
+	write compressed copies of files using given number of processes
+	"""
+	paths = [path for path in paths if path.endswith(compressed_extensions)]
+	if jobs < 2 or len(paths) < 2:
+		for path in paths:
+			compress_output(path)
+		return
+
+	pool = multiprocessing.Pool(jobs)
+	try:
+		for _ in pool.imap_unordered(compress_output, paths,
+			max(len(paths) // (jobs * 4), 1)):
+			pass
+		pool.close()
+	except:
+		pool.terminate()
+		raise
+	finally:
+		pool.join()
+
+
+def remove_compressed(path, formats=('gz', 'br')):
+	"""
+	remove compressed copies of a frozen file
+	"""
+	for format in formats:
+		compressed_path = '{}.{}'.format(path, format)
+		if os.path.isfile(compressed_path):
+			os.remove(compressed_path)
+
+
+def remove_output(root, filename):
+	"""
+	remove frozen file, its compressed copies and
+	its parent directories if they are empty
+	"""
+	path = os.path.join(root, filename)
+	if os.path.isfile(path):
+		os.remove(path)
+	remove_compressed(path)
+
+	parent = os.path.dirname(path)
+	if parent != root and os.path.isdir(parent) and not os.listdir(parent):
+		os.removedirs(parent)
+
+
+def save_profile(path, records, events, top=20):
+	"""
+	print report of slowest urls and write trace of build phases
+	which can be opened in chrome://tracing
+	"""
+	for line in get_report(records, top):
+		click.echo(line)
+
+	create_directory(os.path.dirname(path))
+	with open(path, 'w') as f:
+		json.dump(get_trace(events), f)
+	click.echo('trace written to {}'.format(path))
+
+
+def freeze(current_path, theme_path, jobs=1, full=False, prerender_jobs=0,
+	compress=False, compress_jobs=0, profile=None, profile_top=20,
+	**options):
+	"""
+	Create app and freeze it using given number of worker processes.
+
+	Index lookups made while rendering each url are recorded in a build
+	manifest along with content and site hashes. Unless `full` is set,
+	a later freeze only renders urls depending on modified contents and
+	removes outputs of urls which do not exist anymore.
+
+	Contents are pre-rendered only in current process, workers get
+	rendered html from render cache.
+
+	If `compress` is set, compressed copies of text files are written
+	for web servers serving precompressed files using `compress_jobs`
+	processes, one per CPU if not given.
+
+	If `profile` is set, time of each phase of building urls is recorded,
+	slowest `profile_top` urls are reported and a trace is written
+	to `profile` path.
+	"""
+	flask_app = app.create_app(current_path, theme_path,
+		prerender_jobs=prerender_jobs, profile=bool(profile), **options)
+	freezer = app.freeze
+	root = freezer.root
+	if not os.path.isdir(root):
+		os.makedirs(root)
+
+	site_hash = get_site_hash(current_path, theme_path, options)
+	contents = get_contents_manifest(flask_app)
+	related = get_related_manifest(flask_app)
+
+	# outputs of urls in previous manifest are cleaned up even on full builds
+	manifest = load_manifest(root)
+	if manifest and not full and manifest.get('site') == site_hash:
+		old_urls = manifest['urls']
+		affected = get_affected_keys(manifest['contents'], contents)
+		# related posts lists can change with any post
+		affected.update(app.get_related_keys(
+			manifest.get('related') or {}, related))
+	else:
+		old_urls = manifest['urls'] if manifest else {}
+		affected = None  # build everything
+
+	# static files are cheap to copy and do not depend on contents
+	always_build = set(freezer._static_rules_endpoints())
+	always_build.add('app.custom_static')
+
+	def needs_build(url, endpoint):
+		"""
+		check if url output is missing or depends on modified contents
+		"""
+		previous = old_urls.get(url)
+		return (affected is None or previous is None or
+			endpoint in always_build or
+			affected.intersection(previous['keys']) or
+			not os.path.isfile(os.path.join(root, previous['file'])))
+
+	seen_urls = set()
+	seen_endpoints = set()
+	generated_urls = set()
+	new_urls = {}
+	errors = []
+	profile_records = []
+	profile_events = []
+
+	def collect(generated):
+		"""
+		get urls to be built from (url, endpoint) list,
+		urls which need not be rebuilt keep their previous manifest entry
+		"""
+		pending = []
+		for url, endpoint in generated:
+			seen_endpoints.add(endpoint)
+			if url in seen_urls:
+				continue
+
+			seen_urls.add(url)
+			if needs_build(url, endpoint):
+				pending.append(url)
+			else:
+				new_urls[url] = old_urls[url]
+		return pending
+
+	generated = list(freezer._generate_all_urls())
+	generated_urls.update(url for url, endpoint in generated)
+	pending = collect(generated)
+
+	# urls found while rendering affected pages in a previous build
+	pending.extend(url for url, previous in old_urls.iteritems()
+		if url not in seen_urls and not previous['generated'] and
+		needs_build(url, None))
+	seen_urls.update(pending)
+
+	pool = None
+	if jobs > 1 and pending:
+		pool = multiprocessing.Pool(jobs, initializer=init_worker,
+			initargs=(current_path, theme_path,
+				dict(options, profile=bool(profile))))
+
+	try:
+		while pending:
+			if pool:
+				create_output_directories(freezer, pending)
+				# small chunks to balance load between workers
+				chunk_size = max(len(pending) // (jobs * 4), 1)
+				results = pool.imap_unordered(
+					build_urls, split(sorted(pending), chunk_size))
+			else:
+				results = itertools.imap(build_urls, [pending])
+
+			pending = []
+			for built, chunk_errors, logged_urls, chunk_profile in results:
+				errors.extend(chunk_errors)
+				profile_records.extend(chunk_profile[0])
+				profile_events.extend(chunk_profile[1])
+				pending.extend(collect(logged_urls))
+				for url, filename, keys in built:
+					new_urls[url] = {
+						'file': os.path.relpath(filename, root),
+						'keys': keys,
+						'generated': url in generated_urls
+					}
+
+		if pool:
+			pool.close()
+	except:
+		if pool:
+			pool.terminate()
+		raise
+	finally:
+		if pool:
+			pool.join()
+
+	# views excluded from freezing are not expected to be frozen
+	seen_endpoints.update(rule.endpoint
+		for rule in flask_app.url_map.iter_rules()
+		if rule.rule in app.exclude_from_freeze)
+	freezer._check_endpoints(seen_endpoints)
+
+	if errors:
+		for url, error in errors:
+			click.secho('Error while freezing {}'.format(url), fg='red')
+			click.echo(error)
+		raise ValueError('Failed to freeze {} urls'.format(len(errors)))
+
+	# remove outputs of urls which are not generated anymore,
+	# urls only found while rendering are kept until a full build
+	new_files = set(new['file'] for new in new_urls.itervalues())
+	for url, previous in old_urls.iteritems():
+		if url in new_urls:
+			continue
+		if previous['generated'] or affected is None:
+			if previous['file'] not in new_files:
+				remove_output(root, previous['file'])
+		else:
+			new_urls[url] = previous
+
+	if compress:
+		compress_outputs(sorted(set(os.path.join(root, entry['file'])
+			for entry in new_urls.itervalues())),
+			compress_jobs or multiprocessing.cpu_count())
+	else:
+		# copies written by earlier builds with --compress would be
+		# outdated once files change, only sitemaps are compressed
+		for url, entry in new_urls.iteritems():
+			path = os.path.join(root, entry['file'])
+			if sitemap_url_re.match(url):
+				remove_compressed(path, ['br'])
+				compress_file(path)
+			else:
+				remove_compressed(path)
+
+	manifest = dict(site=site_hash, contents=contents, related=related,
+		urls=new_urls)
+	if flask_app.config['SITE'].get('fingerprint_assets', True):
+		manifest['assets'] = get_assets_manifest(flask_app)
+	save_manifest(root, manifest)
+
+	if profile:
+		save_profile(profile, profile_records, profile_events, profile_top)
+
+	return seen_urls
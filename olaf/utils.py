@@ -10,6 +10,7 @@
 """
 
 import os
+import re
 import datetime
 import contextlib
 from unicodedata import normalize
@@ -85,6 +86,76 @@ def slugify(text, encoding=None,
 	return ''.join(strict_text)
 
 
+# markdown block markers at start of a line (headings, quotes, list items)
+block_marker_re = re.compile(r'^(#+|>+|[*+-]|\d+\.)\s+')
+# reference link definitions
+reference_re = re.compile(r'^\[[^\]]+\]:\s')
+# inline markup replaced by text it contains
+inline_res = [
+	(re.compile(r'<[^>]*>'), ' '),  # html tags
+	(re.compile(r'!\[([^\]]*)\]\([^)]*\)'), ''),  # images
+	(re.compile(r'\[([^\]]*)\]\([^)]*\)'), r'\1'),  # inline links
+	(re.compile(r'\[([^\]]*)\]\[[^\]]*\]'), r'\1'),  # reference links
+	(re.compile(r'\*+|`+|(?<!\w)_+|_+(?!\w)'), '')  # emphasis and code
+]
+
+
+def markdown_to_text(text):
+	"""
+	get rough plain text of markdown source, code blocks,
+	html tags and markup characters are removed
+	"""
+	lines = []
+	in_fence = False
+	in_code = False
+	previous_blank = True
+
+	for line in text.splitlines():
+		stripped = line.strip()
+
+		# fenced code blocks
+		if stripped.startswith(('```', '~~~')):
+			in_fence = not in_fence
+			continue
+		if in_fence:
+			continue
+
+		# indented code blocks start after a blank line
+		if line.startswith(('\t', '    ')) and (previous_blank or in_code):
+			in_code = True
+			continue
+
+		previous_blank = not stripped
+		if stripped:
+			in_code = False
+			if not reference_re.match(stripped):
+				lines.append(block_marker_re.sub('', stripped))
+
+	text = ' '.join(lines)
+	for regex, replacement in inline_res:
+		text = regex.sub(replacement, text)
+
+	return ' '.join(text.split())
+
+
+def truncate_words(text, length, suffix=u'...'):
+	"""
+	truncate text to at most length characters without
+	breaking words, suffix is added if text is truncated
+	"""
+	if len(text) <= length:
+		return text
+
+	truncated = text[:length + 1]
+	if truncated[-1].isspace():
+		truncated = truncated.rstrip()
+	else:
+		words = truncated.rsplit(None, 1)
+		truncated = words[0] if len(words) > 1 else text[:length]
+
+	return truncated.rstrip() + suffix
+
+
 @contextlib.contextmanager
 def change_dir(newPath):
 	"""
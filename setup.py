@@ -22,6 +22,10 @@ setup(
 		'Markdown',
 		'Pygments'
 	],
+	extras_require={
+		'watch': ['pyinotify'],
+		'brotli': ['brotli']
+	},
 	packages=['olaf', 'olaf.tools'],
 	include_package_data=True,
 	classifiers=[
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+	tests - app
+	~~~~~~~~~~~
+
+	test cases for app views
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from flask import url_for
+from click.testing import CliRunner
+
+from olaf import cli, app, assets, contents_dir, posts_dir, \
+	get_theme_by_name
+from olaf.utils import change_dir
+
+
+class TestApp(unittest.TestCase):
+	def setUp(self):
+		self.runner = CliRunner()
+		self.temp_path = tempfile.mkdtemp()
+		with change_dir(self.temp_path):
+			result = self.runner.invoke(cli.createsite, ['site'])
+			self.assertEqual(result.exit_code, 0)
+
+		self.site_path = os.path.join(self.temp_path, 'site')
+		self.app = self.create_app()
+		self.client = self.app.test_client()
+
+	def create_app(self, **options):
+		with change_dir(self.site_path):
+			return app.create_app(
+				self.site_path, get_theme_by_name('basic'), **options)
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_path)
+
+	def test_recent_feed(self):
+		response = self.client.get('/recent.atom')
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.mimetype, 'application/atom+xml')
+		self.assertIn('Hello world!', response.data)
+
+		etag = response.headers['ETag']
+		last_modified = response.headers['Last-Modified']
+
+		# unchanged feed is not sent again
+		response = self.client.get('/recent.atom',
+			headers={'If-None-Match': etag})
+		self.assertEqual(response.status_code, 304)
+		self.assertEqual(response.data, '')
+
+		response = self.client.get('/recent.atom',
+			headers={'If-Modified-Since': last_modified})
+		self.assertEqual(response.status_code, 304)
+
+		# feed is rebuilt once contents change
+		app.content_index.update('posts/hello-world')
+		response = self.client.get('/recent.atom',
+			headers={'If-None-Match': etag})
+		self.assertEqual(response.status_code, 200)
+		self.assertNotIn('Hello world!', response.data)
+
+	def test_index_summaries(self):
+		response = self.client.get('/')
+		self.assertIn('This will be the summary of the post.', response.data)
+
+		# summaries given in front matter do not read post body
+		info = app.content_index.get('hello-world').info
+		self.assertIsNotNone(info._page)
+
+	def test_sitemap(self):
+		response = self.client.get('/sitemap.xml')
+		self.assertEqual(response.status_code, 200)
+		self.assertIn('<urlset', response.data)
+		self.assertIn('/hello-world</loc>', response.data)
+
+		# no sitemap index or shards if urls fit in one sitemap
+		self.assertEqual(
+			self.client.get('/sitemap-index.xml').status_code, 404)
+		self.assertEqual(self.client.get('/sitemap-1.xml').status_code, 404)
+
+		# urls split into shards above sitemap limit
+		self.app.config['SITE']['sitemap_limit'] = 2
+		urls = response.data.count('<url>')
+		shards = (urls + 1) // 2
+
+		index = self.client.get('/sitemap-index.xml').data
+		self.assertEqual(self.client.get('/sitemap.xml').data, index)
+		self.assertEqual(index.count('<sitemap>'), shards)
+
+		shard_urls = 0
+		for shard in range(1, shards + 1):
+			response = self.client.get('/sitemap-{}.xml'.format(shard))
+			self.assertEqual(response.status_code, 200)
+			shard_urls += response.data.count('<url>')
+		self.assertEqual(shard_urls, urls)
+
+		response = self.client.get('/sitemap-{}.xml'.format(shards + 1))
+		self.assertEqual(response.status_code, 404)
+
+	def test_response_cache(self):
+		flask_app = self.create_app(cache_responses=True)
+		client = flask_app.test_client()
+		response_cache = app.response_cache
+
+		data = client.get('/tags/').data
+		self.assertEqual(client.get('/tags/').data, data)
+		self.assertEqual((response_cache.hits, response_cache.misses), (1, 1))
+
+		client.get('/hello-world/')
+		client.get('/sample-page/')
+		self.assertEqual(len(response_cache), 3)
+
+		# content change invalidates only responses depending on it
+		response_cache.invalidate(
+			app.content_index.update('posts/hello-world'))
+		self.assertEqual(len(response_cache), 1)
+		self.assertNotEqual(client.get('/tags/').data, data)
+
+	def test_cache_headers(self):
+		flask_app = self.create_app(cache_headers=True)
+		flask_app.config['SITE']['max_age'] = {'default': 10, 'posts': 60}
+		client = flask_app.test_client()
+
+		response = client.get('/hello-world/')
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.cache_control.max_age, 60)
+		self.assertEqual(response.last_modified.date().isoformat(), '2015-03-10')
+		etag = response.headers['ETag']
+
+		response = client.get('/hello-world/', headers={'If-None-Match': etag})
+		self.assertEqual(response.status_code, 304)
+		self.assertEqual(response.cache_control.max_age, 60)
+
+		response = client.get('/tags/')
+		self.assertEqual(response.cache_control.max_age, 10)
+		self.assertNotEqual(response.headers['ETag'], etag)
+
+		# etags change once contents change
+		app.content_index.update('posts/typography')
+		response = client.get('/hello-world/', headers={'If-None-Match': etag})
+		self.assertEqual(response.status_code, 200)
+
+	def test_asset_fingerprints(self):
+		assets_path = os.path.join(self.site_path, 'assets')
+		if not os.path.isdir(assets_path):
+			os.makedirs(assets_path)
+		with open(os.path.join(assets_path, 'style.css'), 'w') as f:
+			f.write('body {}')
+
+		with change_dir(self.site_path):
+			with self.app.test_request_context():
+				static_url = url_for('static', filename='css/style.css')
+				asset_url = url_for('app.custom_static', filename='style.css')
+				original_url = url_for('app.custom_static',
+					filename='style.css', fingerprint=False)
+
+			self.assertRegexpMatches(
+				static_url, r'^/static/css/style\.[0-9a-f]{10}\.css$')
+			self.assertRegexpMatches(
+				asset_url, r'^/assets/style\.[0-9a-f]{10}\.css$')
+			self.assertEqual(original_url, '/assets/style.css')
+
+			# fingerprinted files are cached for long
+			for url in (static_url, asset_url):
+				response = self.client.get(url)
+				self.assertEqual(response.status_code, 200)
+				self.assertEqual(response.cache_control.max_age,
+					assets.fingerprint_max_age)
+				response.close()
+
+			for url in (original_url, '/assets/style.0000000000.css'):
+				response = self.client.get(url)
+				self.assertEqual(response.data, 'body {}')
+				self.assertNotEqual(response.cache_control.max_age,
+					assets.fingerprint_max_age)
+				response.close()
+
+	def test_pygments_css(self):
+		with self.app.test_request_context():
+			css_url = url_for('app.pygments_css')
+		self.assertRegexpMatches(css_url, r'^/pygments\.[0-9a-f]{10}\.css$')
+
+		response = self.client.get(css_url)
+		self.assertEqual(response.mimetype, 'text/css')
+		self.assertEqual(response.cache_control.max_age,
+			assets.fingerprint_max_age)
+		self.assertEqual(self.client.get('/pygments.css').data, response.data)
+
+		# outdated versions are not cached for long
+		response = self.client.get('/pygments.0000000000.css')
+		self.assertIsNone(response.cache_control.max_age)
+
+	def test_search(self):
+		response = self.client.get('/search?q=hello')
+		self.assertEqual(response.mimetype, 'application/json')
+		results = json.loads(response.data)['results']
+		self.assertEqual(results[0]['url'], '/hello-world/')
+		self.assertEqual(results[0]['title'], 'Hello world!')
+
+		self.assertEqual(json.loads(
+			self.client.get('/search?q=missing').data)['results'], [])
+
+		# shards hold postings of terms referring posts listed in index
+		data = json.loads(self.client.get('/search/index.json').data)
+		urls = [doc['url'] for doc in data['docs']]
+		self.assertIn('he', data['shards'])
+		shard = json.loads(self.client.get('/search/he.json').data)
+		self.assertIn('/hello-world/',
+			[urls[doc] for doc, frequency in shard['hello']])
+		self.assertEqual(self.client.get('/search/zz.json').status_code, 404)
+
+		# modified posts are indexed again
+		app.content_index.update('posts/hello-world')
+		results = json.loads(self.client.get('/search?q=hello').data)['results']
+		self.assertNotIn('/hello-world/', [result['url'] for result in results])
+
+	def test_related_posts(self):
+		response = self.client.get('/hello-world/')
+		self.assertIn('Related articles', response.data)
+		self.assertIn('/typography/', response.data)
+
+		# cached post pages are updated once their related posts change
+		flask_app = self.create_app(cache_responses=True, reload_mode='poll')
+		client = flask_app.test_client()
+		self.assertNotIn('/twin/', client.get('/hello-world/').data)
+		with open(os.path.join(self.site_path, contents_dir, posts_dir,
+			'twin.md'), 'w') as f:
+			f.write('title: Twin\ndate: 2015-03-11\ntags: [other]\n\n'
+				'Olaf is super simple to setup and use, happy blogging.')
+		flask_app.extensions['olaf_watcher'].check()
+		self.assertIn('/twin/', client.get('/hello-world/').data)
+
+		self.app.config['SITE']['related_posts'] = 0
+		response = self.client.get('/hello-world/')
+		self.assertNotIn('Related articles', response.data)
+
+	def test_render_key(self):
+		key = app.get_render_key(u'body', self.app)
+		version = app.markdown_version
+		app.markdown_version = version + '.1'
+		try:
+			# rendered html may change with markdown version
+			self.assertNotEqual(app.get_render_key(u'body', self.app), key)
+		finally:
+			app.markdown_version = version
+
+	def test_prerender(self):
+		self.create_app(prerender_jobs=2)
+		pages = list(app.content_index)
+		prerendered = [page.__dict__.pop('html') for page in pages]
+
+		# installed html is same as html rendered on first access
+		path, max_size = app.render_cache.path, app.render_cache.max_size
+		app.render_cache.init(None, 0)
+		try:
+			self.assertEqual([page.html for page in pages], prerendered)
+		finally:
+			app.render_cache.init(path, max_size)
+
+		# cached pages are not rendered by workers
+		def create_pool(*args):
+			self.fail('pool created for cached pages')
+
+		pool = app.multiprocessing.Pool
+		app.multiprocessing.Pool = create_pool
+		try:
+			self.create_app(prerender_jobs=2)
+		finally:
+			app.multiprocessing.Pool = pool
+		for page in app.content_index:
+			self.assertIn('html', page.__dict__)
+
+	def test_metrics(self):
+		flask_app = self.create_app(metrics=True, cache_responses=True)
+		client = flask_app.test_client()
+		for url in ('/hello-world/', '/hello-world/', '/missing/',
+			'/recent.atom'):
+			client.get(url, buffered=True)
+
+		response = client.get('/_olaf/metrics', buffered=True)
+		self.assertEqual(response.mimetype, 'text/plain')
+		data = response.data
+		self.assertIn('olaf_request_duration_seconds_count'
+			'{endpoint="app.posts"} 3', data)
+		self.assertIn('olaf_request_duration_seconds_bucket'
+			'{endpoint="app.posts",le="+Inf"} 3', data)
+		self.assertIn('olaf_requests_total'
+			'{endpoint="app.posts",status="404"} 1', data)
+		self.assertIn('olaf_response_size_bytes_count'
+			'{endpoint="app.recent_feed"} 1', data)
+		self.assertIn('olaf_cache_hits_total{cache="response"} 1', data)
+		self.assertIn('olaf_cache_misses_total{cache="feed"} 1', data)
+
+		# metrics path is configurable and not listed in sitemap
+		with open(os.path.join(self.site_path, 'config.py'), 'a') as f:
+			f.write("\nSITE['metrics_path'] = '/metrics'\n")
+		flask_app = self.create_app(metrics=True)
+		client = flask_app.test_client()
+		self.assertEqual(client.get('/metrics').status_code, 200)
+		self.assertNotIn('/metrics', client.get('/sitemap.xml').data)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+	tests - caches
+	~~~~~~~~~~~~~~
+
+	test cases for caches
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import unittest
+
+from click.testing import CliRunner
+
+from olaf import cache
+
+
+class TestCache(unittest.TestCase):
+	def setUp(self):
+		self.runner = CliRunner()
+
+	def tearDown(self):
+		pass
+
+	def test_get_hash(self):
+		self.assertEqual(cache.get_hash(u'正體', 'a'), cache.get_hash(u'正體', u'a'))
+		self.assertNotEqual(cache.get_hash('ab', 'c'), cache.get_hash('a', 'bc'))
+
+	def test_disk_cache(self):
+		with self.runner.isolated_filesystem():
+			disk_cache = cache.DiskCache(os.getcwd(), 1024)
+			key = cache.get_hash('key')
+
+			self.assertIsNone(disk_cache.get(key))
+			disk_cache.set(key, u'正體 value')
+			self.assertEqual(disk_cache.get(key), u'正體 value')
+			self.assertEqual((disk_cache.hits, disk_cache.misses), (1, 1))
+
+			# disabled cache
+			disabled_cache = cache.DiskCache(os.getcwd(), 0)
+			self.assertIsNone(disabled_cache.get(key))
+
+	def test_disk_cache_eviction(self):
+		with self.runner.isolated_filesystem():
+			disk_cache = cache.DiskCache(os.getcwd(), 1000)
+			keys = [cache.get_hash(str(n)) for n in range(5)]
+
+			for n, key in enumerate(keys):
+				disk_cache.set(key, u'x' * 300)
+				# make sure modification times are in insertion order
+				path = disk_cache.get_path(key)
+				os.utime(path, (n, n))
+
+			size = sum(entry[1] for entry in disk_cache.entries())
+			self.assertLessEqual(size, 900)
+
+			# latest entry is kept
+			self.assertIsNotNone(disk_cache.get(keys[-1]))
+			self.assertIsNone(disk_cache.get(keys[0]))
+
+	def test_file_cache(self):
+		with self.runner.isolated_filesystem():
+			file_cache = cache.FileCache(interval=60, max_file_size=10)
+			path = os.path.join(os.getcwd(), 'file.txt')
+
+			self.assertFalse(file_cache.exists(path))
+			self.assertIsNone(file_cache.read(path))
+			self.assertTrue(file_cache.isdir(os.getcwd()))
+
+			# missing file is cached till interval or invalidation
+			with open(path, 'w') as f:
+				f.write('content')
+			self.assertIsNone(file_cache.read(path))
+			file_cache.invalidate(path)
+			self.assertEqual(file_cache.read(path), 'content')
+
+			# modified file is read again once revalidated
+			with open(path, 'w') as f:
+				f.write('modified')
+			os.utime(path, (1, 1))
+			file_cache.interval = 0
+			self.assertEqual(file_cache.read(path), 'modified')
+
+			# large files are not cached
+			with open(path, 'w') as f:
+				f.write('x' * 20)
+			os.utime(path, (2, 2))
+			self.assertTrue(file_cache.exists(path))
+			self.assertIsNone(file_cache.read(path))
+
+	def test_response_cache(self):
+		response_cache = cache.ResponseCache(10)
+		self.assertIsNone(response_cache.get('/one/'))
+
+		response_cache.set('/one/', 'one', 3, ['content:posts/one', 'posts'])
+		response_cache.set('/two/', 'two', 3, ['content:posts/two'])
+		self.assertEqual(response_cache.get('/one/'), 'one')
+		self.assertEqual((response_cache.hits, response_cache.misses), (1, 1))
+
+		# least recently used entry is evicted
+		response_cache.set('/three/', 'three', 5, ['posts'])
+		self.assertIsNone(response_cache.get('/two/'))
+		self.assertEqual(response_cache.size, 8)
+
+		# only entries tagged with invalidated keys are removed
+		response_cache.set('/four/', 'four', 1, [])
+		response_cache.invalidate(['posts'])
+		self.assertEqual(len(response_cache), 1)
+		self.assertEqual(response_cache.get('/four/'), 'four')
+
+		# values larger than cache are not stored
+		response_cache.set('/five/', 'five', 11, [])
+		self.assertIsNone(response_cache.get('/five/'))
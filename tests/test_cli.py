@@ -10,13 +10,15 @@
 """
 
 import os
+import gzip
+import json
 import random
 import unittest
 import string
 
 from click.testing import CliRunner
 
-from olaf import cli, contents_dir, posts_dir
+from olaf import cli, contents_dir, posts_dir, cache_dir
 from olaf.utils import change_dir
 
 
@@ -133,6 +135,129 @@ class TestCli(unittest.TestCase):
 
 				self.assertGreater(len(os.listdir(random_path)), 0)
 
+	def test_parallel_freeze(self):
+		with self.runner.isolated_filesystem():
+			site_name = self.get_random_string()
+			result = self.runner.invoke(cli.createsite, [site_name])
+			self.assertEqual(result.exit_code, 0)
+
+			with change_dir(os.path.join(os.getcwd(), site_name)):
+				self.assertEqual(self.runner.invoke(cli.freeze,
+					['-p', 'serial']).exit_code, 0)
+				self.assertEqual(self.runner.invoke(cli.freeze,
+					['-p', 'parallel', '--jobs', '2']).exit_code, 0)
+
+				# parallel freeze output should be same as serial freeze
+				for root, dirs, files in os.walk('serial'):
+					for name in files:
+						serial_file = os.path.join(root, name)
+						parallel_file = os.path.join(
+							'parallel', os.path.relpath(serial_file, 'serial'))
+						with open(serial_file, 'rb') as f:
+							serial_content = f.read()
+						with open(parallel_file, 'rb') as f:
+							self.assertEqual(f.read(), serial_content)
+
+
+	def test_incremental_freeze(self):
+		with self.runner.isolated_filesystem():
+			site_name = self.get_random_string()
+			result = self.runner.invoke(cli.createsite, [site_name])
+			self.assertEqual(result.exit_code, 0)
+
+			with change_dir(os.path.join(os.getcwd(), site_name)):
+				self.assertEqual(self.runner.invoke(cli.freeze,
+					['-p', 'build']).exit_code, 0)
+				self.assertTrue(os.path.exists(
+					os.path.join('build', 'typography', 'index.html')))
+				self.assertTrue(os.path.exists(
+					os.path.join('build', 'sitemap.xml.gz')))
+				self.assertFalse(os.path.exists(
+					os.path.join('build', 'sitemap-index.xml')))
+
+				# pages listing related posts are rebuilt once lists change
+				with open(os.path.join(
+					contents_dir, posts_dir, 'twin.md'), 'w') as f:
+					f.write('title: Twin\ndate: 2015-03-11\ntags: [other]\n\n'
+						'Olaf is super simple to setup and use, happy blogging.')
+				self.assertEqual(self.runner.invoke(cli.freeze,
+					['-p', 'build']).exit_code, 0)
+				with open(os.path.join('build', 'hello-world', 'index.html')) as f:
+					self.assertIn('/twin/', f.read())
+
+				# removed post output should be deleted
+				os.remove(os.path.join(
+					contents_dir, posts_dir, 'typography.md'))
+				self.assertEqual(self.runner.invoke(cli.freeze,
+					['-p', 'build']).exit_code, 0)
+				self.assertFalse(os.path.exists(
+					os.path.join('build', 'typography', 'index.html')))
+
+				# listing pages should not link removed post
+				with open(os.path.join('build', 'index.html')) as f:
+					self.assertNotIn('/typography/', f.read())
+
+				# full builds also delete outputs of removed pages
+				os.remove(os.path.join(
+					contents_dir, posts_dir, 'hello-world.md'))
+				self.assertEqual(self.runner.invoke(cli.freeze,
+					['-p', 'build', '--full']).exit_code, 0)
+				self.assertFalse(os.path.exists(
+					os.path.join('build', 'hello-world', 'index.html')))
+
+	def test_compressed_freeze(self):
+		with self.runner.isolated_filesystem():
+			site_name = self.get_random_string()
+			result = self.runner.invoke(cli.createsite, [site_name])
+			self.assertEqual(result.exit_code, 0)
+
+			with change_dir(os.path.join(os.getcwd(), site_name)):
+				self.assertEqual(self.runner.invoke(cli.freeze,
+					['-p', 'build', '--compress', '--jobs', '2']).exit_code, 0)
+
+				index_path = os.path.join('build', 'index.html')
+				with open(index_path, 'rb') as f:
+					content = f.read()
+				with gzip.open(index_path + '.gz', 'rb') as f:
+					self.assertEqual(f.read(), content)
+
+				# up to date compressed copies are not written again
+				os.utime(index_path + '.gz', (1, 1))
+				os.utime(index_path, (0, 0))
+				self.assertEqual(self.runner.invoke(cli.freeze,
+					['-p', 'build', '--compress']).exit_code, 0)
+				self.assertEqual(os.path.getmtime(index_path + '.gz'), 1)
+
+				# compressed copies are removed once compression is off
+				self.assertEqual(self.runner.invoke(cli.freeze,
+					['-p', 'build']).exit_code, 0)
+				self.assertFalse(os.path.exists(index_path + '.gz'))
+				self.assertTrue(os.path.exists(
+					os.path.join('build', 'sitemap.xml.gz')))
+
+	def test_profiled_freeze(self):
+		with self.runner.isolated_filesystem():
+			site_name = self.get_random_string()
+			result = self.runner.invoke(cli.createsite, [site_name])
+			self.assertEqual(result.exit_code, 0)
+
+			with change_dir(os.path.join(os.getcwd(), site_name)):
+				result = self.runner.invoke(cli.freeze,
+					['-p', 'build', '--profile', '--profile-top', '3'])
+				self.assertEqual(result.exit_code, 0)
+				self.assertIn('markdown', result.output)
+
+				trace_path = os.path.join(cache_dir, cli.profile_trace_name)
+				with open(trace_path) as f:
+					events = json.load(f)['traceEvents']
+
+				# every built url has a trace event
+				urls = set(event['name'] for event in events
+					if event['cat'] == 'url')
+				self.assertIn('/', urls)
+				self.assertIn('/hello-world/', urls)
+				self.assertIn('template',
+					set(event['cat'] for event in events))
 
 	# def test_git(self):
 	# 	pass
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+	tests - highlight
+	~~~~~~~~~~~~~~~~~
+
+	test cases for cached code highlighting
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import unittest
+
+from click.testing import CliRunner
+from markdown import markdown
+
+from olaf import highlight
+
+
+class TestHighlight(unittest.TestCase):
+	def setUp(self):
+		self.runner = CliRunner()
+		highlight.highlight_cache.init(None, 0)
+		self.text = u'\n'.join([
+			u'Some code',
+			u'',
+			u'\t:::python',
+			u'\tdef hello():',
+			u'\t\tprint "正體"',
+			u'',
+			u'Shell',
+			u'',
+			u'\t#!/bin/sh',
+			u'\techo hello'])
+
+	def tearDown(self):
+		highlight.highlight_cache.init(None, 0)
+
+	def test_get_extensions(self):
+		self.assertEqual(highlight.get_extensions(['codehilite', 'toc']),
+			['olaf.highlight', 'toc'])
+
+	def test_highlight(self):
+		cache = highlight.highlight_cache
+		expected = markdown(self.text, extensions=['codehilite'])
+
+		html = markdown(self.text, extensions=['olaf.highlight'])
+		self.assertEqual(html, expected)
+		self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+		# highlighted from memory
+		html = markdown(self.text, extensions=['olaf.highlight'])
+		self.assertEqual(html, expected)
+		self.assertEqual(cache.hits, 2)
+
+		# highlighted from disk
+		with self.runner.isolated_filesystem():
+			cache.init(os.getcwd(), 1024 * 1024)
+			markdown(self.text, extensions=['olaf.highlight'])
+			cache.init(os.getcwd(), 1024 * 1024)
+			html = markdown(self.text, extensions=['olaf.highlight'])
+			self.assertEqual(html, expected)
+			self.assertEqual((cache.hits, cache.misses), (2, 0))
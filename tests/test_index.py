@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+	tests - content index
+	~~~~~~~~~~~~~~~~~~~~~
+
+	test cases for in-memory content index
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import unittest
+import datetime
+
+from olaf import index
+
+
+class Page(object):
+	"""
+	minimal stand-in for flask_flatpages.Page
+	"""
+	def __init__(self, path, body=u'', **meta):
+		self.path = path
+		self.body = body
+		self.meta = meta
+
+
+class TestContentIndex(unittest.TestCase):
+	def setUp(self):
+		self.index = index.ContentIndex()
+
+	def tearDown(self):
+		pass
+
+	def test_get_slug(self):
+		self.assertEqual(index.get_slug('posts/hello-world'), 'hello-world')
+		self.assertEqual(index.get_slug('pages/about/me'), 'about/me')
+		self.assertIsNone(index.get_slug('drafts/hello-world'))
+
+	def test_get_tags(self):
+		self.assertEqual(index.get_tags(Page('posts/one', tags=u'python')),
+			set([u'python']))
+		self.assertEqual(index.get_tags(Page('posts/one', tags=[u'python',
+			2015])), set([u'python', u'2015']))
+		self.assertEqual(index.get_tags(Page('posts/one')), set())
+
+	def test_build(self):
+		pages = [Page('posts/one'), Page('pages/two'), Page('drafts/three')]
+		self.index.build(pages)
+
+		self.assertEqual(len(self.index), 2)
+		self.assertIs(self.index.get('one'), pages[0])
+		self.assertIs(self.index.get('two'), pages[1])
+		self.assertIsNone(self.index.get('three'))
+		self.assertEqual(pages[0].slug, 'one')
+
+		# duplicate slugs in posts and pages
+		with self.assertRaises(ValueError):
+			self.index.build([Page('posts/one'), Page('pages/one')])
+
+	def test_content_info(self):
+		self.index.summary_length = 20
+		body = u'Some **markdown** text ' + u'word ' * 400
+		post = Page('posts/one', body, title='one')
+		self.index.build([post])
+
+		self.assertEqual(post.info.summary, u'Some markdown text...')
+		self.assertEqual(post.info.word_count, 403)
+		self.assertEqual(post.info.reading_time, 2)
+
+		# record is computed once per page object
+		post.body = u''
+		self.assertEqual(post.info.word_count, 403)
+
+	def test_update(self):
+		one, two = Page('posts/one'), Page('posts/two')
+		self.index.build([one, two])
+		generation = self.index.generation
+
+		# unchanged pages
+		self.assertEqual(self.index.update('posts/one', one), set())
+		self.assertEqual(self.index.generation, generation)
+
+		# modified, added and removed pages
+		new_one, three = Page('posts/one'), Page('pages/three')
+		self.assertIn('content:posts/one',
+			self.index.update('posts/one', new_one))
+		self.assertIn('content:pages/three',
+			self.index.update('pages/three', three))
+		self.assertIn('content:posts/two', self.index.update('posts/two'))
+		self.assertGreater(self.index.generation, generation)
+		self.assertIs(self.index.get('one'), new_one)
+		self.assertIs(self.index.get('three'), three)
+		self.assertIsNone(self.index.get('two'))
+
+	def test_update_duplicates(self):
+		one = Page('posts/one')
+		self.index.build([one])
+
+		duplicate = Page('pages/one')
+		self.index.update('pages/one', duplicate)
+		self.assertEqual(
+			sorted(self.index.duplicates['one']), ['pages/one', 'posts/one'])
+
+		self.index.update('posts/one')
+		self.assertEqual(self.index.duplicates, {})
+		self.assertIs(self.index.get('one'), duplicate)
+
+	def test_query(self):
+		date = datetime.date
+		one = Page('posts/one', title='one', date=date(2014, 3, 1),
+			tags=['python'])
+		two = Page('posts/two', title='two', date=date(2015, 1, 2),
+			tags=['python', 'flask'])
+		three = Page('posts/three', title='three',
+			date=datetime.datetime(2015, 2, 1, 10, 30), tags=['flask'])
+		draft = Page('posts/draft', title='draft')
+		page = Page('pages/about', title='about', date=date(2015, 1, 1))
+		self.index.build([three, page, one, draft, two])
+
+		# valid posts sorted by date
+		self.assertEqual(list(self.index.query()), [one, two, three])
+
+		# filters
+		self.assertEqual(list(self.index.query(tag='python')), [one, two])
+		self.assertEqual(list(self.index.query(tag='flask', year=2015)), [two, three])
+		self.assertEqual(list(self.index.query(year=2015, month=2)), [three])
+		self.assertEqual(list(self.index.query(month=2)), [one, two, three])
+		self.assertEqual(list(self.index.query(tag='invalid')), [])
+		self.assertEqual(
+			self.index.tag_counts(), [('flask', 2), ('python', 2)])
+
+		# removed tag from a post
+		new_two = Page('posts/two', title='two', date=date(2013, 1, 2),
+			tags=['python'])
+		self.index.update('posts/two', new_two)
+		self.assertEqual(list(self.index.query()), [new_two, one, three])
+		self.assertEqual(list(self.index.query(tag='flask')), [three])
+
+	def test_archive(self):
+		date = datetime.date
+		one = Page('posts/one', title='one', date=date(2014, 12, 31))
+		two = Page('posts/two', title='two', date=date(2015, 1, 1))
+		three = Page('posts/three', title='three', date=date(2015, 1, 20))
+		four = Page('posts/four', title='four', date=date(2015, 3, 2))
+		self.index.build([one, two, three, four])
+
+		self.assertEqual(self.index.archive_counts(), [
+			(2015, 3, [(3, 1), (1, 2)]),
+			(2014, 1, [(12, 1)])])
+
+		# date range lookups
+		self.assertEqual(list(self.index.query(year=2015)), [two, three, four])
+		self.assertEqual(list(self.index.query(year=2015, month=1)), [two, three])
+		self.assertEqual(list(self.index.query(year=2014, month=12)), [one])
+		self.assertEqual(list(self.index.query(year=2016)), [])
+		self.assertEqual(list(self.index.query(year=2015, month=13)), [])
+
+		# counts are patched on removal
+		self.index.update('posts/one')
+		self.assertEqual(self.index.archive_counts(), [
+			(2015, 3, [(3, 1), (1, 2)])])
+
+	def test_last_modified(self):
+		date = datetime.date
+		one = Page('posts/one', title='one', date=date(2015, 1, 1),
+			updated=date(2015, 6, 1), tags=['python'])
+		two = Page('posts/two', title='two', date=date(2015, 3, 1))
+		about = Page('pages/about', title='about')
+		self.index.build([one, two, about])
+
+		modified = self.index.last_modified
+		self.assertEqual(modified(['posts']), datetime.datetime(2015, 6, 1))
+		self.assertEqual(modified(['archive:2015/3']), datetime.datetime(2015, 3, 1))
+		self.assertEqual(modified(['tag:python', 'content:posts/two']),
+			datetime.datetime(2015, 6, 1))
+		self.assertIsNone(modified(['pages', 'tag:invalid', 'archive:2015/13']))
+
+		# dates are recomputed once contents change
+		self.index.update('posts/one')
+		self.assertEqual(modified(['posts']), datetime.datetime(2015, 3, 1))
+
+	def test_cursor(self):
+		date = datetime.date
+		posts = [Page('posts/{}'.format(day), title=str(day),
+			date=date(2015, 1, day)) for day in range(1, 8)]
+		self.index.build(posts)
+
+		latest = self.index.query(reverse=True)
+		self.assertEqual(len(latest), 7)
+		self.assertEqual(list(latest), posts[::-1])
+		self.assertIs(latest[0], posts[-1])
+		self.assertIs(latest[-1], posts[0])
+
+		# pagination
+		self.assertEqual(list(latest.page(1, 3)), posts[6:3:-1])
+		self.assertEqual(list(latest.page(3, 3)), [posts[0]])
+		self.assertEqual(list(latest.page(4, 3)), [])
+		self.assertEqual(list(latest.page(0, 3)), [])
+
+		# windows
+		oldest = self.index.query()
+		self.assertEqual(list(oldest.window(2, 2)), posts[2:4])
+		self.assertEqual(list(oldest.window(5, 10)), posts[5:])
+		self.assertEqual(list(latest.window(limit=2)), posts[:4:-1])
+		self.assertFalse(oldest.window(7))
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+	tests - pages
+	~~~~~~~~~~~~~
+
+	test cases for lazily loaded pages
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import unittest
+
+from click.testing import CliRunner
+
+from olaf import pages
+
+
+class TestPages(unittest.TestCase):
+	def setUp(self):
+		self.runner = CliRunner()
+
+	def tearDown(self):
+		pass
+
+	def test_scan_file(self):
+		with self.runner.isolated_filesystem():
+			filename = os.path.join(os.getcwd(), 'post.md')
+			with open(filename, 'wb') as f:
+				f.write(u'title: 正體\ndate: 2015-01-01\n  \nbody\n\nmore'.encode('utf-8'))
+
+			meta, offset = pages.scan_file(filename)
+			self.assertEqual(meta, u'title: 正體\ndate: 2015-01-01')
+
+			page = pages.LazyPage('posts/post', meta, filename, offset,
+				'utf-8', None)
+			self.assertEqual(page.meta['title'], u'正體')
+			self.assertEqual(page.body, u'body\n\nmore')
+
+			# file without body
+			with open(filename, 'wb') as f:
+				f.write('title: hello')
+
+			meta, offset = pages.scan_file(filename)
+			self.assertEqual(meta, u'title: hello')
+
+			page = pages.LazyPage('posts/post', meta, filename, offset,
+				'utf-8', None)
+			self.assertEqual(page.body, u'')
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+	tests - profiler
+	~~~~~~~~~~~~~~~~
+
+	test cases for build profiler
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import time
+import unittest
+
+from olaf import profiler
+
+
+class TestProfiler(unittest.TestCase):
+	def setUp(self):
+		self.profiler = profiler.BuildProfiler()
+
+	def test_disabled(self):
+		with self.profiler.url('/'):
+			with self.profiler.phase('markdown'):
+				pass
+		self.assertEqual(self.profiler.pop(), ([], []))
+
+	def test_phases(self):
+		self.profiler.enabled = True
+
+		# phases outside of urls are not recorded
+		with self.profiler.phase('load'):
+			pass
+
+		with self.profiler.url('/'):
+			with self.profiler.phase('request'):
+				with self.profiler.phase('template'):
+					with self.profiler.phase('markdown'):
+						time.sleep(0.01)
+				with self.profiler.phase('template'):
+					pass
+
+		records, events = self.profiler.pop()
+		self.assertEqual(len(records), 1)
+		url, total, phases = records[0]
+		self.assertEqual(url, '/')
+		self.assertEqual(sorted(phases),
+			['markdown', 'template', 'view', 'write'])
+
+		# nested time is only counted for innermost phase
+		self.assertGreaterEqual(phases['markdown'], 0.01)
+		self.assertLess(phases['template'], 0.01)
+		self.assertAlmostEqual(sum(phases.values()), total)
+
+		trace = profiler.get_trace(events)['traceEvents']
+		self.assertEqual([event['cat'] for event in trace],
+			['url', 'request', 'template', 'markdown', 'template'])
+		self.assertEqual(trace[0]['ts'], 0)
+
+		lines = profiler.get_report(records, top=1)
+		self.assertEqual(len(lines), 3)
+		self.assertTrue(lines[1].endswith('/'))
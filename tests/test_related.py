@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+	tests - related
+	~~~~~~~~~~~~~~~
+
+	test cases for related posts
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import unittest
+
+from olaf import related
+from olaf.search import SearchIndex
+
+
+class Page(object):
+	"""
+	minimal stand-in for flask_flatpages.Page
+	"""
+	def __init__(self, path, body=u'', **meta):
+		self.path = path
+		self.body = body
+		self.meta = meta
+
+
+class TestRelated(unittest.TestCase):
+	def setUp(self):
+		self.posts = [
+			Page('posts/flask-views', u'Routing requests to flask views.',
+				title=u'Flask views', tags=[u'python']),
+			Page('posts/flask-templates', u'Rendering jinja templates in flask.',
+				title=u'Flask templates', tags=[u'python']),
+			Page('posts/jinja', u'Jinja templates and filters.',
+				title=u'Jinja', tags=[u'web']),
+			Page('posts/gardening', u'Growing tomatoes during summer.',
+				title=u'Gardening')]
+
+		self.index = SearchIndex()
+		self.index.sync(self.posts)
+		self.tags = {
+			u'python': self.posts[:2],
+			u'web': self.posts[2:3]}
+
+	def test_get_related(self):
+		results = related.get_related(self.index, self.tags)
+		self.assertEqual(sorted(results), sorted(self.index.docs))
+
+		# shared tags and terms rank above shared terms only
+		self.assertEqual(results['posts/flask-views'],
+			['posts/flask-templates'])
+		self.assertEqual(results['posts/flask-templates'],
+			['posts/flask-views', 'posts/jinja'])
+		self.assertEqual(results['posts/gardening'], [])
+
+		results = related.get_related(self.index, self.tags, limit=1)
+		self.assertEqual(results['posts/flask-templates'],
+			['posts/flask-views'])
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+	tests - reloader
+	~~~~~~~~~~~~~~~~
+
+	test cases for content watchers
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import unittest
+
+from click.testing import CliRunner
+
+from olaf import cli, app, reloader, contents_dir, posts_dir, \
+	get_theme_by_name
+from olaf.utils import change_dir
+
+
+class TestReloader(unittest.TestCase):
+	def setUp(self):
+		self.runner = CliRunner()
+
+	def tearDown(self):
+		pass
+
+	def test_polling_watcher(self):
+		with self.runner.isolated_filesystem():
+			root = os.getcwd()
+			one = os.path.join(root, 'one.md')
+			with open(one, 'w') as f:
+				f.write('one')
+
+			watcher = reloader.PollingWatcher(root)
+			watcher.check()
+			self.assertEqual(watcher.pop_changes(), set())
+
+			# added, modified and removed files
+			two = os.path.join(root, 'two.md')
+			with open(two, 'w') as f:
+				f.write('two')
+			os.utime(one, (1, 1))
+			watcher.check()
+			self.assertEqual(watcher.pop_changes(), set([one, two]))
+
+			os.remove(two)
+			watcher.check()
+			self.assertEqual(watcher.pop_changes(), set([two]))
+
+		with self.assertRaises(ValueError):
+			reloader.get_watcher(os.getcwd(), 'invalid')
+		self.assertIsNone(reloader.get_watcher(os.getcwd(), 'off'))
+
+	def test_reload_contents(self):
+		with self.runner.isolated_filesystem():
+			result = self.runner.invoke(cli.createsite, ['site'])
+			self.assertEqual(result.exit_code, 0)
+
+			with change_dir(os.path.join(os.getcwd(), 'site')):
+				flask_app = app.create_app(os.getcwd(),
+					get_theme_by_name('basic'), reload_mode='poll')
+				watcher = flask_app.extensions['olaf_watcher']
+				client = flask_app.test_client()
+				generation = app.content_index.generation
+
+				post_path = os.path.join(
+					os.getcwd(), contents_dir, posts_dir, 'new-post.md')
+				with open(post_path, 'w') as f:
+					f.write('title: New post\ndate: 2015-01-01\n\nbody')
+
+				# changes are applied only once reported by watcher
+				self.assertEqual(client.get('/new-post/').status_code, 404)
+				watcher.check()
+				self.assertEqual(client.get('/new-post/').status_code, 200)
+				self.assertGreater(app.content_index.generation, generation)
+
+				os.remove(post_path)
+				watcher.check()
+				self.assertEqual(client.get('/new-post/').status_code, 404)
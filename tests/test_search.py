@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+	tests - search
+	~~~~~~~~~~~~~~
+
+	test cases for full-text search index
+
+	:copyright: (c) 2015 by Vivek R.
+	:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import unittest
+
+from click.testing import CliRunner
+
+from olaf import search
+from olaf.cache import DiskCache
+
+
+class Page(object):
+	"""
+	minimal stand-in for flask_flatpages.Page
+	"""
+	def __init__(self, path, body=u'', **meta):
+		self.path = path
+		self.body = body
+		self.meta = meta
+
+
+class TestSearchIndex(unittest.TestCase):
+	def setUp(self):
+		self.runner = CliRunner()
+		self.posts = [
+			Page('posts/flask', u'Building sites with *Flask* and Jinja.',
+				title=u'Flask basics', tags=[u'python']),
+			Page('posts/markdown', u'Markdown to html, with Flask too.',
+				title=u'Markdown', tags=[u'writing']),
+			Page('posts/unicode', u'Ünïcödé text and 正體 words.',
+				title=u'Unicode')]
+
+	def test_tokenize(self):
+		self.assertEqual(search.tokenize(u'Hello, a World! 42 Ünï'),
+			[u'hello', u'world', u'42', u'ünï'])
+
+	def test_search(self):
+		index = search.SearchIndex()
+		index.sync(self.posts)
+		self.assertEqual(len(index), 3)
+
+		# title matches are ranked above body matches
+		results = index.search(u'flask')
+		self.assertEqual([path for path, score in results],
+			['posts/flask', 'posts/markdown'])
+		self.assertGreater(results[0][1], results[1][1])
+
+		self.assertEqual(index.search(u'FLASK', 1)[0][0], 'posts/flask')
+		self.assertEqual(index.search(u'python')[0][0], 'posts/flask')
+		self.assertEqual(index.search(u'ünïcödé')[0][0], 'posts/unicode')
+		self.assertEqual(index.search(u'missing'), [])
+		self.assertEqual(index.search(u''), [])
+
+	def test_sync(self):
+		index = search.SearchIndex()
+		self.assertTrue(index.sync(self.posts))
+		self.assertEqual(index.tokenized, 3)
+
+		# unchanged posts are not tokenized again
+		self.assertFalse(index.sync(self.posts))
+		self.assertFalse(index.sync(list(self.posts)))
+		self.assertEqual(index.tokenized, 3)
+
+		modified = Page('posts/markdown', u'Rewritten.', title=u'Markdown')
+		self.assertTrue(index.sync([self.posts[0], modified]))
+		self.assertEqual(index.tokenized, 4)
+		self.assertEqual(len(index), 2)
+		self.assertEqual(index.search(u'flask')[0][0], 'posts/flask')
+		self.assertEqual(index.search(u'rewritten')[0][0], 'posts/markdown')
+		self.assertNotIn(u'jinja', dict(
+			(term, postings) for term, postings in index.postings.items()
+			if 'posts/markdown' in postings))
+
+		# pages which fail to index are indexed again on next sync
+		broken = Page('posts/broken', None, title=u'Broken', tags=[2015])
+		with self.assertRaises(TypeError):
+			index.sync([broken])
+		broken.body = u'Fixed.'
+		self.assertTrue(index.sync([broken]))
+		self.assertEqual(index.search(u'2015')[0][0], 'posts/broken')
+
+		index.sync([])
+		self.assertEqual((len(index), index.postings, index.total_length),
+			(0, {}, 0))
+
+	def test_cache(self):
+		with self.runner.isolated_filesystem():
+			cache = DiskCache(os.getcwd(), 1024 * 1024)
+			index = search.SearchIndex(cache)
+			index.sync(self.posts)
+
+			# rebuilt index reads tokenized posts from cache
+			rebuilt = search.SearchIndex(cache)
+			rebuilt.sync(self.posts)
+			self.assertEqual(rebuilt.tokenized, 0)
+			self.assertEqual(rebuilt.postings, index.postings)
+
+	def test_export(self):
+		index = search.SearchIndex()
+		index.sync(self.posts)
+
+		paths, shards = index.export()
+		self.assertEqual(paths, ['posts/flask', 'posts/markdown', 'posts/unicode'])
+		self.assertEqual(shards['fl'][u'flask'][0], [0, 4])
+		self.assertEqual(shards['fl'][u'flask'][1][0], 1)
+		self.assertIn(u'jinja', shards['ji'])
+		self.assertTrue(all(len(prefix) == search.prefix_length
+			for prefix in shards))
+
+		settings = index.settings()
+		self.assertEqual(settings['average_length'],
+			float(index.total_length) / 3)
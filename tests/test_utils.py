@@ -94,3 +94,31 @@ class TestUtils(unittest.TestCase):
 			os.mkdir(temp_path)
 			with utils.change_dir(temp_path):
 				self.assertEqual(temp_path, os.getcwd())
+
+	def test_markdown_to_text(self):
+		text = u'\n'.join([
+			u'# Heading',
+			u'',
+			u'Some **bold** and *emphasis* with [a link](http://example.com)',
+			u'and <cite>html</cite> ![image](image.png) `code` snake_case.',
+			u'',
+			u'\t#!python',
+			u'',
+			u'\tprint "hello"',
+			u'',
+			u'```',
+			u'fenced code',
+			u'```',
+			u'',
+			u'*   list item',
+			u'> quote'])
+
+		self.assertEqual(utils.markdown_to_text(text),
+			u'Heading Some bold and emphasis with a link and html code '
+			u'snake_case. list item quote')
+
+	def test_truncate_words(self):
+		self.assertEqual(utils.truncate_words(u'hello world', 20), u'hello world')
+		self.assertEqual(utils.truncate_words(u'hello world', 8), u'hello...')
+		self.assertEqual(utils.truncate_words(u'hello world', 5), u'hello...')
+		self.assertEqual(utils.truncate_words(u'hello', 3, u''), u'hel')